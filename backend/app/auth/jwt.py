@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Literal, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Literal, Optional, TypeVar
 
 import jwt
 from passlib.context import CryptContext
 
 from ..config import get_settings
+from ..metrics import register_stats, span
+from ..services.cache import TTLCache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+REFRESH_DIGEST_PREFIX = "hmac-sha256$"
+
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_slots: asyncio.Semaphore | None = None
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the password hashing pool is saturated and the caller should retry later."""
+
 
 MAX_PASSWORD_BYTES = 72
 
@@ -27,11 +47,144 @@ def _truncate_password(password: str) -> str:
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(_truncate_password(password))
+    with span("auth.hash_password"):
+        return pwd_context.hash(_truncate_password(password))
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(_truncate_password(password), hashed)
+    with span("auth.verify_password"):
+        return pwd_context.verify(_truncate_password(password), hashed)
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor, _hash_slots
+    if _hash_executor is None:
+        settings = get_settings()
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            thread_name_prefix="bcrypt",
+        )
+        _hash_slots = asyncio.Semaphore(settings.password_hash_max_pending)
+    return _hash_executor
+
+
+async def _run_in_hash_pool(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run a bcrypt call on the bounded hashing pool.
+
+    At most `password_hash_max_pending` calls may be queued or running; callers
+    beyond that wait up to `password_hash_queue_timeout` seconds for a slot and
+    then get `PasswordHasherBusy` instead of growing the queue without bound.
+    """
+
+    executor = _get_hash_executor()
+    assert _hash_slots is not None
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), timeout=get_settings().password_hash_queue_timeout)
+    except asyncio.TimeoutError as exc:
+        raise PasswordHasherBusy("Password hashing pool is saturated") from exc
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    finally:
+        _hash_slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _run_in_hash_pool(verify_password, password, hashed)
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_executor, _hash_slots
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+    _hash_executor = None
+    _hash_slots = None
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Digest a refresh token for storage in `Session.refresh_token_hash`.
+
+    Refresh tokens are long random JWTs, so a keyed HMAC-SHA256 is enough and
+    costs microseconds instead of a bcrypt round.
+    """
+
+    settings = get_settings()
+    key = (settings.refresh_token_hmac_key or settings.jwt_secret).encode("utf-8")
+    digest = hmac.new(key, token.encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"{REFRESH_DIGEST_PREFIX}{digest}"
+
+
+async def verify_refresh_token(token: str, stored_hash: str) -> bool:
+    """
+    Check a refresh token against its stored digest in constant time.
+
+    Sessions created before the switch to HMAC still hold bcrypt hashes; those
+    are verified on the hashing pool once and disappear when `/refresh` rotates
+    the session.
+    """
+
+    if stored_hash.startswith(REFRESH_DIGEST_PREFIX):
+        return hmac.compare_digest(hash_refresh_token(token), stored_hash)
+    return await verify_password_async(token, stored_hash)
+
+
+def _is_asymmetric(algorithm: str) -> bool:
+    return not algorithm.startswith("HS")
+
+
+@lru_cache()
+def _signing_key() -> str:
+    settings = get_settings()
+    if not _is_asymmetric(settings.jwt_algorithm):
+        return settings.jwt_secret
+    if not settings.jwt_private_key_file or not settings.jwt_key_id:
+        raise RuntimeError("JWT_PRIVATE_KEY_FILE and JWT_KEY_ID are required for asymmetric JWT algorithms")
+    with open(settings.jwt_private_key_file, encoding="utf-8") as fh:
+        return fh.read()
+
+
+@lru_cache()
+def _verification_keys() -> Dict[str, str]:
+    """
+    Load public keys from `JWT_PUBLIC_KEYS_DIR`, one `<kid>.pem` file per key.
+
+    To rotate, add the new key's public half, switch `JWT_KEY_ID` and
+    `JWT_PRIVATE_KEY_FILE` to it, and remove the old file once every token
+    it signed has expired.
+    """
+
+    directory = get_settings().jwt_public_keys_dir
+    keys: Dict[str, str] = {}
+    if not directory:
+        return keys
+    for name in os.listdir(directory):
+        kid, ext = os.path.splitext(name)
+        if ext == ".pem":
+            with open(os.path.join(directory, name), encoding="utf-8") as fh:
+                keys[kid] = fh.read()
+    return keys
+
+
+def _encode(payload: Dict[str, Any]) -> str:
+    settings = get_settings()
+    headers = {"kid": settings.jwt_key_id} if _is_asymmetric(settings.jwt_algorithm) else None
+    return jwt.encode(payload, _signing_key(), algorithm=settings.jwt_algorithm, headers=headers)
+
+
+def _verification_key(token: str) -> str:
+    settings = get_settings()
+    if not _is_asymmetric(settings.jwt_algorithm):
+        return settings.jwt_secret
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = _verification_keys().get(kid) if kid else None
+    if key is None:
+        raise jwt.InvalidTokenError("Unknown signing key")
+    return key
 
 
 def create_access_token(subject: str, additional_claims: Dict[str, Any] | None = None) -> str:
@@ -40,21 +193,56 @@ def create_access_token(subject: str, additional_claims: Dict[str, Any] | None =
     payload = {"sub": subject, "exp": expire, "type": "access"}
     if additional_claims:
         payload.update(additional_claims)
-    return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    return _encode(payload)
 
 
 def create_refresh_token(subject: str, session_id: str) -> str:
     settings = get_settings()
     expire = datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
     payload = {"sub": subject, "exp": expire, "type": "refresh", "sid": session_id}
-    return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    return _encode(payload)
+
+
+_claims_cache: TTLCache[bytes, Dict[str, Any]] = TTLCache(maxsize=get_settings().jwt_cache_size, ttl=0)
 
 
 def decode_token(token: str, expected_type: Optional[Literal["access", "refresh"]] = None) -> Dict[str, Any]:
+    """
+    Verify `token` and return its claims.
+
+    Verified access tokens are remembered, keyed by their SHA-256 digest,
+    until their `exp`, so repeat requests with the same bearer token skip
+    parsing and signature checks. Refresh tokens are single-use and never
+    cached.
+    """
+
+    with span("auth.decode_token"):
+        return _decode_token(token, expected_type)
+
+
+def _decode_token(token: str, expected_type: Optional[Literal["access", "refresh"]]) -> Dict[str, Any]:
+    cacheable = expected_type == "access"
+    if cacheable:
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = _claims_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
     settings = get_settings()
-    payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    payload = jwt.decode(token, _verification_key(token), algorithms=[settings.jwt_algorithm])
     token_type = payload.get("type")
     if expected_type and token_type != expected_type:
         raise jwt.InvalidTokenError("Invalid token type")
+
+    if cacheable:
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            _claims_cache.set(key, dict(payload), ttl=remaining)
     return payload
 
+
+def token_cache_stats() -> Dict[str, float]:
+    return _claims_cache.stats()
+
+
+register_stats("token_cache", token_cache_stats)
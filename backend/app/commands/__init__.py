@@ -0,0 +1 @@
+"""One-off maintenance commands, run from `backend/` with `python -m app.commands.<name>`."""
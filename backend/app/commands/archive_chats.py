@@ -0,0 +1,25 @@
+"""Move old Chat and Analytics documents into compressed per-user, per-month archives."""
+
+import argparse
+import asyncio
+from typing import Optional
+
+from app.db import init_db
+from app.services.archive import archive_old_documents
+
+
+async def main(older_than_days: Optional[int]) -> None:
+    await init_db()
+    totals = await archive_old_documents(older_than_days)
+    print(", ".join(f"archived {count} {kind}" for kind, count in totals.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=None,
+        help="Archive whole months that ended before this many days ago (default: ARCHIVE_AFTER_DAYS)",
+    )
+    asyncio.run(main(parser.parse_args().older_than_days))
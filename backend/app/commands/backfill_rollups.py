@@ -0,0 +1,19 @@
+"""Rebuild daily/weekly analytics rollups from raw Analytics documents."""
+
+import argparse
+import asyncio
+
+from app.db import init_db
+from app.services.analytics_rollups import backfill_rollups
+
+
+async def main(batch_size: int) -> None:
+    await init_db()
+    written = await backfill_rollups(batch_size=batch_size)
+    print(f"Wrote {written} rollup documents")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args().batch_size))
@@ -0,0 +1,28 @@
+"""Refresh (or rebuild) the materialized admin analytics summaries."""
+
+import argparse
+import asyncio
+
+from app.db import init_db
+from app.services.admin_analytics import rebuild_admin_analytics, refresh_admin_analytics
+
+
+async def main(rebuild_weeks: int) -> None:
+    await init_db()
+    if rebuild_weeks:
+        weeks = await rebuild_admin_analytics(weeks=rebuild_weeks)
+        print(f"Rebuilt admin analytics for {weeks} weeks")
+    else:
+        result = await refresh_admin_analytics()
+        print(f"Refreshed admin analytics for week of {result['week_start']:%Y-%m-%d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rebuild-weeks",
+        type=int,
+        default=0,
+        help="Recompute this many weeks (including the current one) instead of refreshing",
+    )
+    asyncio.run(main(parser.parse_args().rebuild_weeks))
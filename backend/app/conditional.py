@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict
+
+from fastapi import HTTPException, Request, status
+from starlette.datastructures import Headers, MutableHeaders
+
+ETAG_STATE_KEY = "etag"
+
+
+def weak_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def check_etag(request: Request, etag: str) -> None:
+    """
+    Answer 304 if the client already holds `etag`; otherwise remember it so
+    `ETagMiddleware` stamps it on the 200 response.
+
+    Call this from a route dependency, before the handler does any real work.
+    """
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison (RFC 9110 §13.1.2): ignore the W/ prefix on both sides.
+        wanted = etag.removeprefix("W/")
+        if if_none_match.strip() == "*" or any(
+            tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(",")
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+            )
+    request.state.etag = etag
+
+
+class ETagMiddleware:
+    """Stamp the validator set by `check_etag` on successful responses."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                etag = scope.get("state", {}).get(ETAG_STATE_KEY)
+                if etag and "etag" not in Headers(raw=message["headers"]):
+                    headers = MutableHeaders(raw=message["headers"])
+                    headers["ETag"] = etag
+                    headers["Cache-Control"] = "private, no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
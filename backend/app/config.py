@@ -1,4 +1,6 @@
 from functools import lru_cache
+from typing import Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -11,16 +13,112 @@ class Settings(BaseSettings):
 
     jwt_secret: str = Field(..., alias="JWT_SECRET")
     jwt_algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
+    jwt_key_id: str | None = Field(None, alias="JWT_KEY_ID")
+    jwt_private_key_file: str | None = Field(None, alias="JWT_PRIVATE_KEY_FILE")
+    jwt_public_keys_dir: str | None = Field(None, alias="JWT_PUBLIC_KEYS_DIR")
+    jwt_cache_size: int = Field(10_000, alias="JWT_CACHE_SIZE")
     access_token_expire_minutes: int = Field(15, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_expire_days: int = Field(7, alias="REFRESH_TOKEN_EXPIRE_DAYS")
+    max_sessions_per_user: int = Field(10, alias="MAX_SESSIONS_PER_USER")
+    refresh_token_hmac_key: str | None = Field(None, alias="REFRESH_TOKEN_HMAC_KEY")
+
+    password_hash_workers: int = Field(4, alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(64, alias="PASSWORD_HASH_MAX_PENDING")
+    password_hash_queue_timeout: float = Field(5.0, alias="PASSWORD_HASH_QUEUE_TIMEOUT")
 
     google_client_id: str = Field(..., alias="GOOGLE_CLIENT_ID")
     google_client_secret: str = Field(..., alias="GOOGLE_CLIENT_SECRET")
     google_redirect_uri: str = Field(..., alias="GOOGLE_REDIRECT_URI")
 
+    risk_lexicon_path: str | None = Field(None, alias="RISK_LEXICON_PATH")
+    risk_base_score: float = Field(0.1, alias="RISK_BASE_SCORE")
+
+    write_behind_enabled: bool = Field(True, alias="WRITE_BEHIND_ENABLED")
+    write_behind_batch_size: int = Field(200, alias="WRITE_BEHIND_BATCH_SIZE")
+    write_behind_flush_interval: float = Field(0.05, alias="WRITE_BEHIND_FLUSH_INTERVAL")
+    write_behind_max_pending: int = Field(10_000, alias="WRITE_BEHIND_MAX_PENDING")
+    write_behind_enqueue_timeout: float = Field(0.01, alias="WRITE_BEHIND_ENQUEUE_TIMEOUT")
+    write_behind_max_retries: int = Field(3, alias="WRITE_BEHIND_MAX_RETRIES")
+    write_behind_retry_backoff: float = Field(0.1, alias="WRITE_BEHIND_RETRY_BACKOFF")
+
+    rollup_flush_interval: float = Field(1.0, alias="ROLLUP_FLUSH_INTERVAL")
+
+    alerts_enabled: bool = Field(False, alias="ALERTS_ENABLED")
+    alert_risk_threshold: float = Field(0.8, alias="ALERT_RISK_THRESHOLD")
+    alert_workers: int = Field(2, alias="ALERT_WORKERS")
+    alert_batch_size: int = Field(100, alias="ALERT_BATCH_SIZE")
+    alert_poll_interval: float = Field(1.0, alias="ALERT_POLL_INTERVAL")
+    alert_window: float = Field(3600.0, alias="ALERT_WINDOW")
+    alert_max_attempts: int = Field(5, alias="ALERT_MAX_ATTEMPTS")
+    alert_retry_backoff: float = Field(30.0, alias="ALERT_RETRY_BACKOFF")
+    alert_lease: float = Field(60.0, alias="ALERT_LEASE")
+    alert_insert_attempts: int = Field(5, alias="ALERT_INSERT_ATTEMPTS")
+    alert_insert_backoff: float = Field(0.5, alias="ALERT_INSERT_BACKOFF")
+    alert_retention_days: int = Field(30, alias="ALERT_RETENTION_DAYS")
+    alert_notifier: str = Field("log", alias="ALERT_NOTIFIER")
+    alert_file_path: str = Field("/tmp/zenspace-alerts.ndjson", alias="ALERT_FILE_PATH")
+
+    archive_after_days: int = Field(180, alias="ARCHIVE_AFTER_DAYS")
+    archive_codec: str = Field("zlib", alias="ARCHIVE_CODEC")
+    archive_segment_size: int = Field(2000, alias="ARCHIVE_SEGMENT_SIZE")
+    archive_cache_size: int = Field(32, alias="ARCHIVE_CACHE_SIZE")
+    archive_cache_ttl: float = Field(300.0, alias="ARCHIVE_CACHE_TTL")
+
+    admin_analytics_refresh_interval: float = Field(0.0, alias="ADMIN_ANALYTICS_REFRESH_INTERVAL")
+    admin_rising_threshold: float = Field(0.1, alias="ADMIN_RISING_THRESHOLD")
+    admin_rising_min_messages: int = Field(3, alias="ADMIN_RISING_MIN_MESSAGES")
+
+    user_cache_size: int = Field(10_000, alias="USER_CACHE_SIZE")
+    user_cache_ttl: float = Field(60.0, alias="USER_CACHE_TTL")
+
+    metrics_enabled: bool = Field(False, alias="METRICS_ENABLED")
+
+    rate_limit_enabled: bool = Field(True, alias="RATE_LIMIT_ENABLED")
+    rate_limit_max_keys: int = Field(100_000, alias="RATE_LIMIT_MAX_KEYS")
+    # Per-limit overrides, merged over services.rate_limit.DEFAULT_RATE_LIMITS.
+    rate_limits: Dict[str, str] = Field(default_factory=dict, alias="RATE_LIMITS")
+
+    idempotency_ttl: int = Field(86_400, alias="IDEMPOTENCY_TTL")
+    idempotency_wait_timeout: float = Field(35.0, alias="IDEMPOTENCY_WAIT_TIMEOUT")
+    idempotency_lease: float = Field(60.0, alias="IDEMPOTENCY_LEASE")
+
+    admin_token: str | None = Field(None, alias="ADMIN_TOKEN")
+
+    profiling_enabled: bool = Field(False, alias="PROFILING_ENABLED")
+    profiling_sample_rate: float = Field(0.0, alias="PROFILING_SAMPLE_RATE")
+    profiling_interval: float = Field(0.001, alias="PROFILING_INTERVAL")
+    profiling_dir: str = Field("/tmp/zenspace-profiles", alias="PROFILING_DIR")
+    profiling_max_profiles: int = Field(50, alias="PROFILING_MAX_PROFILES")
+
+    compression_enabled: bool = Field(True, alias="COMPRESSION_ENABLED")
+    compression_min_size: int = Field(1024, alias="COMPRESSION_MIN_SIZE")
+
     frontend_origin: str = Field("http://localhost:5173", alias="FRONTEND_ORIGIN")
     ai_bot_url: str = Field("http://127.0.0.1:5000/api/chat", alias="AI_BOT_URL")
+    ai_bot_urls: str = Field("", alias="AI_BOT_URLS")
+    ai_bot_stream_url: str | None = Field(None, alias="AI_BOT_STREAM_URL")
     ai_bot_timeout: float = Field(30.0, alias="AI_BOT_TIMEOUT")
+    ai_bot_connect_timeout: float = Field(5.0, alias="AI_BOT_CONNECT_TIMEOUT")
+    ai_bot_max_connections: int = Field(100, alias="AI_BOT_MAX_CONNECTIONS")
+    ai_bot_max_keepalive: int = Field(20, alias="AI_BOT_MAX_KEEPALIVE")
+    ai_bot_keepalive_expiry: float = Field(30.0, alias="AI_BOT_KEEPALIVE_EXPIRY")
+    ai_bot_http2: bool = Field(False, alias="AI_BOT_HTTP2")
+    ai_bot_max_retries: int = Field(2, alias="AI_BOT_MAX_RETRIES")
+    ai_bot_retry_backoff: float = Field(0.1, alias="AI_BOT_RETRY_BACKOFF")
+    ai_bot_deadline: float = Field(35.0, alias="AI_BOT_DEADLINE")
+    ai_bot_breaker_failures: int = Field(5, alias="AI_BOT_BREAKER_FAILURES")
+    ai_bot_breaker_reset: float = Field(30.0, alias="AI_BOT_BREAKER_RESET")
+    ai_bot_hedge_percentile: float | None = Field(None, alias="AI_BOT_HEDGE_PERCENTILE")
+    ai_bot_hedge_min_samples: int = Field(50, alias="AI_BOT_HEDGE_MIN_SAMPLES")
+    ai_bot_max_concurrency: int = Field(256, alias="AI_BOT_MAX_CONCURRENCY")
+
+    context_max_turns: int = Field(6, alias="CONTEXT_MAX_TURNS")
+    context_char_budget: int = Field(2_000, alias="CONTEXT_CHAR_BUDGET")
+    context_max_users: int = Field(10_000, alias="CONTEXT_MAX_USERS")
+
+    reply_cache_enabled: bool = Field(False, alias="REPLY_CACHE_ENABLED")
+    reply_cache_size: int = Field(5_000, alias="REPLY_CACHE_SIZE")
+    reply_cache_ttl: float = Field(300.0, alias="REPLY_CACHE_TTL")
 
 
 @lru_cache()
@@ -0,0 +1,9 @@
+from datetime import datetime, timezone
+
+
+def to_naive_utc(at: datetime) -> datetime:
+    """Convert an aware datetime to the naive-UTC form stored in Mongo; naive ones are taken as UTC."""
+
+    if at.tzinfo is None:
+        return at
+    return at.astimezone(timezone.utc).replace(tzinfo=None)
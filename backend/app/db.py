@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from app.config import get_settings
+from app.metrics import MongoCommandMetrics, metrics_enabled
+from app.models.admin_analytics import CohortFlagSummary, CohortWeekSummary, UserRiskTrend
 from app.models.analytics import Analytics
+from app.models.analytics_rollup import AnalyticsRollup
+from app.models.archive import ArchiveSegment
 from app.models.chat import Chat
+from app.models.guardian_alert import GuardianAlert, GuardianAlertWindow
+from app.models.idempotency import IdempotencyRecord
 from app.models.session import Session
 from app.models.user import User
 
@@ -27,15 +33,50 @@ async def init_db() -> None:
 
     settings = get_settings()
 
-    _client = AsyncIOMotorClient(settings.mongo_uri)
+    listeners = [MongoCommandMetrics()] if metrics_enabled() else []
+    _client = AsyncIOMotorClient(settings.mongo_uri, event_listeners=listeners)
     database = _client[settings.mongo_db or "zenspace"]
 
+    await migrate_session_ttl(database)
     await init_beanie(
         database=database,
-        document_models=[User, Session, Chat, Analytics],
+        document_models=[
+            User,
+            Session,
+            Chat,
+            Analytics,
+            AnalyticsRollup,
+            IdempotencyRecord,
+            UserRiskTrend,
+            CohortWeekSummary,
+            CohortFlagSummary,
+            ArchiveSegment,
+            GuardianAlert,
+            GuardianAlertWindow,
+        ],
     )
 
 
+async def migrate_session_ttl(database: AsyncIOMotorDatabase) -> None:
+    """
+    Turn the legacy plain `expires_at_1` index on `sessions` into a TTL index.
+
+    Creating the TTL index directly would conflict with the existing index on
+    the same key, so the old one is converted in place with `collMod`.
+    """
+
+    collection = database[Session.Settings.name]
+    indexes = await collection.index_information()
+    legacy = indexes.get("expires_at_1")
+    if legacy is not None and "expireAfterSeconds" not in legacy:
+        await database.command(
+            {
+                "collMod": Session.Settings.name,
+                "index": {"keyPattern": {"expires_at": 1}, "expireAfterSeconds": 0},
+            }
+        )
+
+
 def get_db_client() -> AsyncIOMotorClient:
     """
     Retrieve the initialized MongoDB client instance.
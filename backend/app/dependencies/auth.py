@@ -1,28 +1,52 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from bson import ObjectId
 
 from ..auth.jwt import decode_token
+from ..config import get_settings
 from ..models.user import User
+from ..services.user_cache import get_cached_user
 
 
 security = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
-    if credentials is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+async def get_user_from_token(token: str) -> User:
+    """
+    Resolve an access token to its `User`.
+
+    Shared by the bearer dependency and transports that cannot carry an
+    `Authorization` header, such as browser WebSockets.
+
+    Raises:
+        HTTPException: 401 if the token is invalid, expired or its user is gone.
+    """
 
-    token = credentials.credentials
     try:
         payload = decode_token(token, expected_type="access")
         sub = payload.get("sub")
         if not sub:
             raise ValueError("Missing subject")
-        user = await User.get(ObjectId(sub))
+        user = await get_cached_user(sub)
         if not user:
             raise ValueError("User not found")
         return user
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
 
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    return await get_user_from_token(credentials.credentials)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Gate operator endpoints behind the `ADMIN_TOKEN` shared secret, sent as `X-Admin-Token`."""
+
+    expected = get_settings().admin_token
+    if not expected or not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
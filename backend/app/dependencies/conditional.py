@@ -0,0 +1,32 @@
+from fastapi import Depends, Request
+
+from ..conditional import check_etag, weak_etag
+from ..models.analytics import Analytics
+from ..models.chat import Chat
+from ..models.user import User
+from .auth import get_current_user
+
+
+async def user_etag(request: Request, current_user: User = Depends(get_current_user)) -> None:
+    # The user is already loaded (usually from the user cache), so this costs nothing.
+    check_etag(request, weak_etag("user", current_user.id, current_user.updatedAt.isoformat()))
+
+
+async def chat_history_etag(request: Request, current_user: User = Depends(get_current_user)) -> None:
+    collection = Chat.get_motor_collection()
+    newest = await collection.find_one(
+        {"user_id": current_user.id}, projection={"_id": 0, "created_at": 1}, sort=[("created_at", -1)]
+    )
+    count = await collection.count_documents({"user_id": current_user.id})
+    stamp = newest["created_at"].isoformat() if newest else ""
+    check_etag(request, weak_etag("chats", current_user.id, stamp, count, request.url.query))
+
+
+async def analytics_etag(request: Request, current_user: User = Depends(get_current_user)) -> None:
+    collection = Analytics.get_motor_collection()
+    newest = await collection.find_one(
+        {"user_id": current_user.id}, projection={"_id": 0, "date": 1}, sort=[("date", -1)]
+    )
+    count = await collection.count_documents({"user_id": current_user.id})
+    stamp = newest["date"].isoformat() if newest else ""
+    check_etag(request, weak_etag("analytics", current_user.id, stamp, count))
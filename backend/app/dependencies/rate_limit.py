@@ -0,0 +1,47 @@
+import math
+from typing import Callable, Literal, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
+
+from ..auth.jwt import decode_token
+from ..services.rate_limit import take_token
+from .auth import security
+
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(name: str, per: Literal["ip", "user"]) -> Callable:
+    """
+    Build a dependency enforcing the `RATE_LIMITS[name]` token bucket per client IP or per user.
+
+    Add it to the route decorator's `dependencies` so it runs before
+    `get_current_user`. Per-user keys come from the access token's `sub`
+    (verified through the claims cache), so a rejection never touches Mongo or
+    the bot. Requests without a valid token are keyed by IP instead.
+    """
+
+    async def dependency(
+        request: Request,
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    ) -> None:
+        key = None
+        if per == "user" and credentials is not None:
+            try:
+                key = "user:" + str(decode_token(credentials.credentials, expected_type="access")["sub"])
+            except Exception:
+                key = None
+        if key is None:
+            key = "ip:" + _client_ip(request)
+
+        retry_after = await take_token(name, key)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    return dependency
@@ -1,17 +1,30 @@
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 
+from .auth.jwt import PasswordHasherBusy, shutdown_hash_pool
+from .compression import CompressionMiddleware
+from .conditional import ETagMiddleware
 from .config import get_settings
 from .db import init_db
+from .metrics import MetricsMiddleware, metrics_enabled, metrics_response
+from .profiling import ProfilingMiddleware
 from .routes import auth as auth_routes
 from .routes import users as user_routes
 from .routes import chat as chat_routes
 from .routes import analytics as analytics_routes
+from .routes import admin as admin_routes
+from .routes import admin_analytics as admin_analytics_routes
+from .services.admin_analytics import close_admin_analytics, init_admin_analytics
+from .services.ai_bot import close_ai_client, init_ai_client
+from .services.analytics_rollups import close_rollups, init_rollups
+from .services.guardian_alerts import close_alerts, init_alerts
+from .services.write_behind import close_write_behind, init_write_behind
 
 settings = get_settings()
-app = FastAPI(title="ZenSpace API", version="1.0.0")
+app = FastAPI(title="ZenSpace API", version="1.0.0", default_response_class=ORJSONResponse)
 origins = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
@@ -31,6 +44,30 @@ app.add_middleware(
 @app.on_event("startup")
 async def on_startup():
     await init_db()
+    await init_ai_client()
+    await init_write_behind()
+    await init_rollups()
+    await init_admin_analytics()
+    await init_alerts()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await close_alerts()
+    await close_ai_client()
+    await close_write_behind()
+    await close_rollups()
+    await close_admin_analytics()
+    shutdown_hash_pool()
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
 
 
 app.add_middleware(
@@ -47,10 +84,30 @@ async def health():
     return {"status": "ok", "service": "zenspace"}
 
 
+app.add_middleware(ETagMiddleware)
+
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+
+
+if metrics_enabled():
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return metrics_response()
+
+
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+
 app.include_router(auth_routes.router)
 app.include_router(user_routes.router)
 app.include_router(chat_routes.router)
 app.include_router(analytics_routes.router)
+app.include_router(admin_routes.router)
+app.include_router(admin_analytics_routes.router)
 
 
 if __name__ == "__main__":
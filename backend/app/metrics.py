@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import os
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, Mapping, Optional
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+
+from .config import get_settings
+
+_enabled: Optional[bool] = None
+_NULL_SPAN = nullcontext()
+
+REQUEST_LATENCY = Histogram(
+    "zenspace_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status.",
+    ["method", "route", "status"],
+)
+STAGE_LATENCY = Histogram(
+    "zenspace_stage_duration_seconds",
+    "Latency of internal stages (bot calls, hashing, token decode, risk scan, ...).",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+MONGO_LATENCY = Histogram(
+    "zenspace_mongo_command_duration_seconds",
+    "MongoDB command latency as seen by the driver, by command and collection.",
+    ["command", "collection", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+def metrics_enabled() -> bool:
+    # Read on first use, not at import, so importing instrumented modules needs no settings yet.
+    global _enabled
+    if _enabled is None:
+        _enabled = get_settings().metrics_enabled
+    return _enabled
+
+
+StatsProvider = Callable[[], Mapping[str, Any]]
+_stats_providers: Dict[str, StatsProvider] = {}
+
+
+def register_stats(component: str, provider: StatsProvider) -> None:
+    """
+    Publish a component's in-process counters (queue depth, cache hits, ...).
+
+    Numeric values are exported as `zenspace_component_stat{component, stat}`
+    and every value is listed by `GET /api/admin/stats`. `provider` is only
+    called when one of those is read.
+    """
+
+    _stats_providers[component] = provider
+
+
+def collect_stats() -> Dict[str, Dict[str, Any]]:
+    return {component: dict(provider()) for component, provider in _stats_providers.items()}
+
+
+class ComponentStatsCollector:
+    """Prometheus collector reading the providers passed to `register_stats` at scrape time."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        family = GaugeMetricFamily(
+            "zenspace_component_stat",
+            "In-process counters and gauges of internal components (per worker).",
+            labels=["component", "stat"],
+        )
+        for component, stats in collect_stats().items():
+            for stat, value in stats.items():
+                if isinstance(value, (int, float)):
+                    family.add_metric([component, stat], float(value))
+        yield family
+
+
+_component_stats = ComponentStatsCollector()
+REGISTRY.register(_component_stats)
+
+
+def span(stage: str) -> ContextManager[Any]:
+    """
+    Time a block under `zenspace_stage_duration_seconds{stage=...}`.
+
+    Returns a shared no-op context manager when metrics are disabled, so
+    instrumented code pays a single flag check.
+    """
+
+    if not metrics_enabled():
+        return _NULL_SPAN
+    return STAGE_LATENCY.labels(stage).time()
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Driver-level listener that times every command Beanie sends through Motor."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[int, tuple] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        self._inflight[event.request_id] = (event.command_name, collection)
+
+    def _finish(self, event: Any, outcome: str) -> None:
+        command, collection = self._inflight.pop(event.request_id, (event.command_name, ""))
+        MONGO_LATENCY.labels(command, collection, outcome).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "error")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording `zenspace_http_request_duration_seconds`.
+
+    Requests are labelled with the matched route template rather than the raw
+    path, so ids in URLs do not explode label cardinality.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], template, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+
+def metrics_response() -> Response:
+    """
+    Render all metrics in Prometheus text format.
+
+    With `PROMETHEUS_MULTIPROC_DIR` set (one directory shared by all worker
+    processes), samples from every worker are aggregated; component stats
+    still come from the worker answering the scrape.
+    """
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_component_stats)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Dict
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+class UserRiskTrend(Document):
+    """One user's week compared with the week before; materialized from weekly rollups."""
+
+    user_id: PydanticObjectId
+    week_start: datetime
+    cohort: str
+    messages: int = 0
+    mean_risk: float = 0.0
+    max_risk: float = 0.0
+    prev_messages: int = 0
+    prev_mean_risk: float = 0.0
+    delta: float = 0.0
+    rising: bool = False
+    flag_counts: Dict[str, int] = Field(default_factory=dict)
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "admin_user_risk_trends"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("week_start", ASCENDING)], name="user_week", unique=True),
+            IndexModel(
+                [("week_start", ASCENDING), ("rising", ASCENDING), ("delta", DESCENDING)],
+                name="week_rising_delta",
+            ),
+        ]
+
+
+class CohortWeekSummary(Document):
+    """Activity of one signup-month cohort in one week."""
+
+    cohort: str
+    week_start: datetime
+    messages: int = 0
+    active_users: int = 0
+    rising_users: int = 0
+    mean_risk: float = 0.0
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "admin_cohort_weeks"
+        indexes = [
+            IndexModel([("week_start", ASCENDING), ("cohort", ASCENDING)], name="week_cohort", unique=True),
+        ]
+
+
+class CohortFlagSummary(Document):
+    """How often one risk flag fired within one cohort in one week."""
+
+    cohort: str
+    week_start: datetime
+    flag: str
+    occurrences: int = 0
+    users_flagged: int = 0
+    messages: int = 0
+    frequency: float = 0.0
+    refreshed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "admin_cohort_flags"
+        indexes = [
+            IndexModel(
+                [("week_start", ASCENDING), ("cohort", ASCENDING), ("flag", ASCENDING)],
+                name="week_cohort_flag",
+                unique=True,
+            ),
+            IndexModel(
+                [("week_start", ASCENDING), ("cohort", ASCENDING), ("frequency", DESCENDING)],
+                name="week_cohort_frequency",
+            ),
+        ]
@@ -1,12 +1,14 @@
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+import pymongo
 from beanie import Document, PydanticObjectId
+from pymongo import IndexModel
 from pydantic import Field
 
 
 class Analytics(Document):
-    user_id: Optional[PydanticObjectId] = Field(default=None, index=True)
+    user_id: Optional[PydanticObjectId] = None
     date: datetime = Field(default_factory=datetime.utcnow)
     risk_score: float = 0.0
     flags: Dict[str, Any] = Field(default_factory=dict)
@@ -14,4 +16,11 @@ class Analytics(Document):
 
     class Settings:
         name = "analytics"
+        indexes = [
+            # Serves the per-user newest-first listing and its ETag probe.
+            IndexModel(
+                [("user_id", pymongo.ASCENDING), ("date", pymongo.DESCENDING)],
+                name="user_date",
+            ),
+        ]
 
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Dict, Literal
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class AnalyticsRollup(Document):
+    user_id: PydanticObjectId
+    period: Literal["day", "week"]
+    period_start: datetime
+    # Stored as "count"; the attribute is renamed so it does not shadow Document.count().
+    total: int = Field(0, alias="count")
+    risk_sum: float = 0.0
+    risk_max: float = 0.0
+    flag_counts: Dict[str, int] = Field(default_factory=dict)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "analytics_rollups"
+        indexes = [
+            IndexModel(
+                [("user_id", ASCENDING), ("period", ASCENDING), ("period_start", ASCENDING)],
+                name="user_period_start",
+                unique=True,
+            ),
+            # Lets the admin analytics refresh find rollups changed since its last run.
+            IndexModel(
+                [("period", ASCENDING), ("period_start", ASCENDING), ("updated_at", ASCENDING)],
+                name="period_start_updated",
+            ),
+        ]
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class ArchiveSegment(Document):
+    """
+    An immutable, compressed batch of archived `Chat` or `Analytics` documents
+    for one user and calendar month. A month usually fits in one part; busy
+    months are split into several.
+    """
+
+    user_id: Optional[PydanticObjectId] = None
+    kind: Literal["chats", "analytics"]
+    month: datetime
+    part: int = 0
+    codec: Literal["zlib", "zstd"] = "zlib"
+    documents: int = Field(0, alias="count")
+    first_at: datetime
+    last_at: datetime
+    raw_size: int = 0
+    blob: bytes
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "archives"
+        indexes = [
+            IndexModel(
+                [("user_id", ASCENDING), ("kind", ASCENDING), ("month", ASCENDING), ("part", ASCENDING)],
+                name="user_kind_month_part",
+                unique=True,
+            ),
+        ]
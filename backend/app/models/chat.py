@@ -3,10 +3,11 @@ from typing import Optional, List
 
 from beanie import Document, PydanticObjectId
 from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
 
 
 class Chat(Document):
-    user_id: Optional[PydanticObjectId] = Field(default=None, index=True)
+    user_id: Optional[PydanticObjectId] = None
     message: str
     reply: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -15,4 +16,16 @@ class Chat(Document):
 
     class Settings:
         name = "chats"
+        indexes = [
+            IndexModel(
+                [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="user_created_at",
+            ),
+            # The equality prefix on user_id keeps every search inside one user's chats.
+            IndexModel(
+                [("user_id", ASCENDING), ("message", TEXT), ("reply", TEXT)],
+                name="user_text",
+                weights={"message": 3, "reply": 1},
+            ),
+        ]
 
@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class GuardianAlert(Document):
+    """A high-risk chat event waiting to be (or already) reported to the user's guardian."""
+
+    user_id: PydanticObjectId
+    risk_score: float
+    flags: List[str] = Field(default_factory=list)
+    categories: Dict[str, float] = Field(default_factory=dict)
+    status: Literal["pending", "processing", "sent", "failed", "undeliverable"] = "pending"
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    lease: Optional[str] = None
+    lease_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
+    expires_at: datetime
+
+    class Settings:
+        name = "guardian_alerts"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+            IndexModel([("lease", ASCENDING)], name="lease"),
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        ]
+
+
+class GuardianAlertWindow(Document):
+    """Per-user rate-limit window shared by every alert worker."""
+
+    user_id: PydanticObjectId
+    next_allowed_at: datetime
+
+    class Settings:
+        name = "guardian_alert_windows"
+        indexes = [
+            IndexModel([("user_id", ASCENDING)], name="user_unique", unique=True),
+        ]
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class IdempotencyRecord(Document):
+    key: str
+    user_id: PydanticObjectId
+    fingerprint: str
+    state: Literal["pending", "done"] = "pending"
+    response: Optional[Dict[str, Any]] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # While pending: which attempt holds the key, and when its claim lapses so a retry may take it over.
+    lease_token: Optional[str] = None
+    lease_until: Optional[datetime] = None
+    expires_at: datetime
+
+    class Settings:
+        name = "idempotency_keys"
+        indexes = [
+            IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        ]
@@ -3,10 +3,11 @@ from typing import Optional
 
 from beanie import Document, PydanticObjectId
 from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 
 class Session(Document):
-    user_id: PydanticObjectId = Field(index=True)
+    user_id: PydanticObjectId
     refresh_token_hash: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     expires_at: datetime
@@ -15,5 +16,9 @@ class Session(Document):
 
     class Settings:
         name = "sessions"
-        indexes = ["+expires_at"]
-
+        indexes = [
+            # Mongo's TTL monitor deletes sessions once `expires_at` has passed.
+            # Keeps the default name so `migrate_session_ttl` can convert the old plain index in place.
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_1", expireAfterSeconds=0),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+        ]
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional, Literal
 
-from beanie import Document, Indexed
+from beanie import Document, Indexed, Insert, Replace, Save, SaveChanges, before_event
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -28,6 +28,7 @@ class User(Document):
     class Settings:
         name = "users"
 
+    @before_event(Insert, Replace, Save, SaveChanges)
     async def before_save(self):
         self.updatedAt = datetime.utcnow()
 
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import os
+import random
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .config import get_settings
+
+PROFILE_HEADER = b"x-profile-token"
+_NAME_RE = re.compile(r"^[\w.-]+\.html$")
+
+
+class ProfileStore:
+    """
+    Bounded directory of HTML profiles. Oldest files are deleted once more than
+    `max_profiles` exist.
+    """
+
+    def __init__(self, directory: str, max_profiles: int) -> None:
+        self.directory = directory
+        self.max_profiles = max_profiles
+        os.makedirs(directory, exist_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not _NAME_RE.match(name):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append({"name": name, "size": stat.st_size, "created_at": stat.st_mtime})
+        entries.sort(key=lambda entry: entry["created_at"], reverse=True)
+        return entries
+
+    def path_for(self, name: str) -> Optional[str]:
+        if not _NAME_RE.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def save(self, label: str, html: str) -> str:
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}.html"
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as fh:
+            fh.write(html)
+        for stale in self.list()[self.max_profiles :]:
+            try:
+                os.remove(os.path.join(self.directory, stale["name"]))
+            except FileNotFoundError:
+                pass
+        return name
+
+
+_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = ProfileStore(settings.profiling_dir, settings.profiling_max_profiles)
+    return _store
+
+
+def _render_and_save(profiler: Any, label: str) -> None:
+    # Rendering a long profile to HTML is CPU-heavy; keep it with the file write.
+    get_profile_store().save(label, profiler.output_html())
+
+
+class ProfilingMiddleware:
+    """
+    Profile selected requests with pyinstrument's statistical, async-aware sampler.
+
+    A request is profiled when it sends `X-Profile-Token: <ADMIN_TOKEN>` or
+    is picked by `PROFILING_SAMPLE_RATE`. At most one request is profiled at a
+    time; others pass through untouched. The HTML report is rendered and
+    written to the profile store in a worker thread, off the event loop. Only
+    installed when `PROFILING_ENABLED` is set.
+    """
+
+    def __init__(self, app: Any) -> None:
+        from pyinstrument import Profiler
+
+        settings = get_settings()
+        self.app = app
+        self._profiler_cls = Profiler
+        self.interval = settings.profiling_interval
+        self.sample_rate = settings.profiling_sample_rate
+        self.token = settings.admin_token.encode() if settings.admin_token else None
+        self._busy = False
+
+    def _selected(self, scope: Dict[str, Any]) -> bool:
+        if self.token is not None:
+            for name, value in scope.get("headers", ()):
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or self._busy or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profiler = self._profiler_cls(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            self._busy = False
+            label = f"{scope['method']}{re.sub(r'[^A-Za-z0-9]+', '_', scope['path'])}"[:80]
+            await asyncio.to_thread(_render_and_save, profiler, label)
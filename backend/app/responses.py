@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """
+    Serialise a pydantic model straight to JSON bytes.
+
+    Returning a `Response` makes FastAPI skip re-validating the value against
+    the route's `response_model` (which is still used for the OpenAPI schema).
+    Only use it with models built from trusted data, e.g. via `model_construct`.
+    """
+
+    return Response(model.model_dump_json(by_alias=True), status_code=status_code, media_type="application/json")
+
+
+def list_response(adapter: TypeAdapter[Any], items: Sequence[Any], status_code: int = 200) -> Response:
+    """`model_response` for a list, serialised in one pass through a cached `TypeAdapter`."""
+
+    return Response(adapter.dump_json(items, by_alias=True), status_code=status_code, media_type="application/json")
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from ..config import get_settings
+from ..dependencies.auth import require_admin
+from ..metrics import collect_stats
+from ..profiling import get_profile_store
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _profiling_store():
+    if not get_settings().profiling_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    return get_profile_store()
+
+
+@router.get("/stats")
+async def component_stats():
+    """Counters of in-process components (caches, queues, pools) for the worker serving the request."""
+
+    return collect_stats()
+
+
+@router.get("/profiles")
+async def list_profiles():
+    return _profiling_store().list()
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    path = _profiling_store().path_for(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="text/html", filename=name)
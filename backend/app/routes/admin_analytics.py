@@ -0,0 +1,122 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, TypeAdapter
+
+from ..dependencies.auth import require_admin
+from ..models.admin_analytics import CohortFlagSummary, CohortWeekSummary, UserRiskTrend
+from ..responses import list_response
+from ..services.admin_analytics import refresh_admin_analytics
+from ..services.analytics_rollups import period_start
+
+router = APIRouter(prefix="/api/admin/analytics", tags=["admin"], dependencies=[Depends(require_admin)])
+
+WEEK_QUERY = Query(None, description="Any moment in the week to report on; defaults to the current week")
+
+
+class RiskTrendOut(BaseModel):
+    user_id: PydanticObjectId
+    cohort: str
+    messages: int
+    mean_risk: float
+    max_risk: float
+    prev_messages: int
+    prev_mean_risk: float
+    delta: float
+    flag_counts: Dict[str, int]
+    refreshed_at: datetime
+
+
+class CohortWeekOut(BaseModel):
+    cohort: str
+    messages: int
+    active_users: int
+    rising_users: int
+    mean_risk: float
+    refreshed_at: datetime
+
+
+class CohortFlagOut(BaseModel):
+    cohort: str
+    flag: str
+    occurrences: int
+    users_flagged: int
+    messages: int
+    frequency: float
+
+
+_trend_list = TypeAdapter(List[RiskTrendOut])
+_cohort_list = TypeAdapter(List[CohortWeekOut])
+_flag_list = TypeAdapter(List[CohortFlagOut])
+
+
+def _week(at: Optional[datetime]) -> datetime:
+    return period_start(at or datetime.utcnow(), "week")
+
+
+@router.get("/rising", response_model=List[RiskTrendOut])
+async def rising_users(
+    week: Optional[datetime] = WEEK_QUERY,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+):
+    """Users whose mean risk rose week over week, steepest rise first."""
+
+    docs = (
+        await UserRiskTrend.find(UserRiskTrend.week_start == _week(week), UserRiskTrend.rising == True)  # noqa: E712
+        .sort("-delta")
+        .skip((page - 1) * page_size)
+        .limit(page_size)
+        .project(RiskTrendOut)
+        .to_list()
+    )
+    return list_response(_trend_list, docs)
+
+
+@router.get("/cohorts", response_model=List[CohortWeekOut])
+async def cohort_activity(
+    week: Optional[datetime] = WEEK_QUERY,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+):
+    docs = (
+        await CohortWeekSummary.find(CohortWeekSummary.week_start == _week(week))
+        .sort("+cohort")
+        .skip((page - 1) * page_size)
+        .limit(page_size)
+        .project(CohortWeekOut)
+        .to_list()
+    )
+    return list_response(_cohort_list, docs)
+
+
+@router.get("/cohorts/flags", response_model=List[CohortFlagOut])
+async def cohort_flags(
+    week: Optional[datetime] = WEEK_QUERY,
+    cohort: Optional[str] = Query(None, description="Signup month, e.g. 2024-05"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+):
+    """Flag frequencies (occurrences per message) per cohort, most frequent first within a cohort."""
+
+    query: Dict[str, Any] = {"week_start": _week(week)}
+    if cohort is not None:
+        query["cohort"] = cohort
+    docs = (
+        await CohortFlagSummary.find(query)
+        .sort([("cohort", 1), ("frequency", -1)])
+        .skip((page - 1) * page_size)
+        .limit(page_size)
+        .project(CohortFlagOut)
+        .to_list()
+    )
+    return list_response(_flag_list, docs)
+
+
+@router.post("/refresh")
+async def refresh_now():
+    """Run an incremental refresh immediately instead of waiting for the schedule."""
+
+    return await refresh_admin_analytics()
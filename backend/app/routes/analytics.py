@@ -1,14 +1,108 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Literal, Optional
 
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field, TypeAdapter
+
+from ..dates import to_naive_utc
 from ..dependencies.auth import get_current_user
+from ..dependencies.conditional import analytics_etag
 from ..models.analytics import Analytics
+from ..models.analytics_rollup import AnalyticsRollup
 from ..models.user import User
+from ..responses import list_response
+from ..services.analytics_rollups import period_start
+from ..services.archive import iter_archived
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
+MAX_ANALYTICS = 100
+MAX_ROLLUP_BUCKETS = 366
+
+
+class AnalyticsOut(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: Optional[PydanticObjectId] = None
+    date: datetime
+    risk_score: float = 0.0
+    flags: Dict[str, Any] = Field(default_factory=dict)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+_analytics_list = TypeAdapter(List[AnalyticsOut])
+
 
-@router.get("/")
+class RollupOut(BaseModel):
+    period_start: datetime
+    count: int
+    mean_risk: float
+    max_risk: float
+    flags: Dict[str, int]
+
+
+@router.get("/", response_model=List[AnalyticsOut], dependencies=[Depends(analytics_etag)])
 async def list_analytics(current_user: User = Depends(get_current_user)):
-    docs = await Analytics.find(Analytics.user_id == current_user.id).sort("-date").limit(100).to_list()
-    return [doc.model_dump(by_alias=True) for doc in docs]
+    """
+    The user's 100 newest analytics entries, continuing into the archive when
+    fewer than that are still live.
+
+    With `WRITE_BEHIND_ENABLED`, entries are stored up to
+    `WRITE_BEHIND_FLUSH_INTERVAL` after the chat that produced them.
+    """
+
+    docs = (
+        await Analytics.find(Analytics.user_id == current_user.id)
+        .sort("-date")
+        .limit(MAX_ANALYTICS)
+        .project(AnalyticsOut)
+        .to_list()
+    )
+    if len(docs) < MAX_ANALYTICS:
+        # Archived months are all older than the live entries; an interrupted archive run can leave both copies.
+        live = {doc.id for doc in docs}
+        archived = iter_archived(current_user.id, "analytics", descending=True)
+        async for doc in archived:
+            if doc["_id"] in live:
+                continue
+            docs.append(AnalyticsOut.model_validate(doc))
+            if len(docs) >= MAX_ANALYTICS:
+                break
+        await archived.aclose()
+    return list_response(_analytics_list, docs)
+
+
+@router.get("/rollups", response_model=List[RollupOut])
+async def list_rollups(
+    period: Literal["day", "week"] = "day",
+    start: Optional[datetime] = Query(None, description="Inclusive; defaults to 30 days or 12 weeks ago"),
+    end: Optional[datetime] = Query(None, description="Inclusive; defaults to now"),
+    current_user: User = Depends(get_current_user),
+):
+    end = to_naive_utc(end) if end else datetime.utcnow()
+    start = start or end - (timedelta(days=29) if period == "day" else timedelta(weeks=11))
+    start = period_start(start, period)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'start' must not be after 'end'")
 
+    docs = (
+        await AnalyticsRollup.find(
+            AnalyticsRollup.user_id == current_user.id,
+            AnalyticsRollup.period == period,
+            AnalyticsRollup.period_start >= start,
+            AnalyticsRollup.period_start <= end,
+        )
+        .sort("+period_start")
+        .limit(MAX_ROLLUP_BUCKETS)
+        .to_list()
+    )
+    return [
+        RollupOut(
+            period_start=doc.period_start,
+            count=doc.total,
+            mean_risk=doc.risk_sum / doc.total if doc.total else 0.0,
+            max_risk=doc.risk_max,
+            flags=doc.flag_counts,
+        )
+        for doc in docs
+    ]
@@ -12,32 +12,33 @@ from ..auth.jwt import (
     create_access_token,
     create_refresh_token,
     decode_token,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    hash_refresh_token,
+    verify_password_async,
+    verify_refresh_token,
 )
 from ..config import get_settings
+from ..dependencies.auth import get_current_user
+from ..dependencies.rate_limit import rate_limit
 from ..models.session import Session
 from ..models.user import ParentInfo, User
+from ..responses import model_response
 from ..schemas.auth import (
     AuthResponse,
     LoginRequest,
-    ParentInput,
     RefreshRequest,
     SignupRequest,
     TokenPair,
     UserOut,
 )
+from ..services.user_cache import invalidate_user
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 settings = get_settings()
 
 
 def user_to_out(user: User) -> UserOut:
-    data = user.model_dump(by_alias=True)
-    data["_id"] = str(user.id)
-    data["parent"] = ParentInput(**user.parent.model_dump())
-    data["firstName"] = user.name.split(" ")[0] if user.name else user.name
-    return UserOut(**data)
+    return UserOut.from_user(user)
 
 
 async def _issue_tokens_for_user(user: User, user_agent: Optional[str], ip: Optional[str]) -> TokenPair:
@@ -47,17 +48,34 @@ async def _issue_tokens_for_user(user: User, user_agent: Optional[str], ip: Opti
     session = Session(
         id=session_id,
         user_id=user.id,
-        refresh_token_hash=hash_password(refresh),
+        refresh_token_hash=hash_refresh_token(refresh),
         expires_at=expires_at,
         user_agent=user_agent,
         ip_address=ip,
     )
     await session.insert()
+    await _evict_old_sessions(user)
     access = create_access_token(str(user.id))
     return TokenPair(access_token=access, refresh_token=refresh)
 
 
-@router.post("/signup", response_model=AuthResponse)
+async def _evict_old_sessions(user: User) -> None:
+    """Keep only the newest `max_sessions_per_user` sessions for `user`."""
+
+    if settings.max_sessions_per_user <= 0:
+        return
+    stale = (
+        await Session.get_motor_collection()
+        .find({"user_id": user.id}, projection={"_id": 1})
+        .sort("created_at", -1)
+        .skip(settings.max_sessions_per_user)
+        .to_list(length=None)
+    )
+    if stale:
+        await Session.find({"_id": {"$in": [doc["_id"] for doc in stale]}}).delete()
+
+
+@router.post("/signup", response_model=AuthResponse, dependencies=[Depends(rate_limit("auth.signup", per="ip"))])
 async def signup(request: Request, payload: SignupRequest):
     email_lower = payload.email.lower()
     existing = await User.find_one(User.email == email_lower)
@@ -70,10 +88,11 @@ async def signup(request: Request, payload: SignupRequest):
 
     if existing:
         if existing.authProvider == "google" and not existing.passwordHash:
-            existing.passwordHash = hash_password(payload.password)
+            existing.passwordHash = await hash_password_async(payload.password)
             existing.parent = parent
             existing.authProvider = "manual"
             await existing.save()
+            await invalidate_user(existing.id)
             user = existing
         else:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
@@ -81,32 +100,33 @@ async def signup(request: Request, payload: SignupRequest):
         user = User(
             name=payload.name,
             email=email_lower,
-            passwordHash=hash_password(payload.password),
+            passwordHash=await hash_password_async(payload.password),
             parent=parent,
             authProvider="manual",
             createdAt=datetime.utcnow(),
             updatedAt=datetime.utcnow(),
         )
         await user.insert()
+        await invalidate_user(user.id)
 
     ua = request.headers.get("user-agent")
     ip = request.client.host if request.client else None
     tokens = await _issue_tokens_for_user(user, ua, ip)
-    return AuthResponse(user=user_to_out(user), tokens=tokens)
+    return model_response(AuthResponse.model_construct(user=user_to_out(user), tokens=tokens))
 
 
-@router.post("/login", response_model=AuthResponse)
+@router.post("/login", response_model=AuthResponse, dependencies=[Depends(rate_limit("auth.login", per="ip"))])
 async def login(request: Request, payload: LoginRequest):
     email_lower = payload.email.lower()
     user = await User.find_one(User.email == email_lower)
 
-    if not user or not user.passwordHash or not verify_password(payload.password, user.passwordHash):
+    if not user or not user.passwordHash or not await verify_password_async(payload.password, user.passwordHash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     ua = request.headers.get("user-agent")
     ip = request.client.host if request.client else None
     tokens = await _issue_tokens_for_user(user, ua, ip)
-    return AuthResponse(user=user_to_out(user), tokens=tokens)
+    return model_response(AuthResponse.model_construct(user=user_to_out(user), tokens=tokens))
 
 
 @router.get("/google/start")
@@ -132,6 +152,7 @@ async def google_callback(request: Request):
         user.googleSub = sub
         user.authProvider = "google"
         await user.save()
+        await invalidate_user(user.id)
     else:
         user = User(
             name=name,
@@ -142,6 +163,7 @@ async def google_callback(request: Request):
             googleSub=sub,
         )
         await user.insert()
+        await invalidate_user(user.id)
 
     ua = request.headers.get("user-agent")
     ip = request.client.host if request.client else None
@@ -186,7 +208,7 @@ async def refresh_tokens(request: Request, payload: RefreshRequest):
         await session_obj.delete()
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session expired")
 
-    if not verify_password(payload.refresh_token, session_obj.refresh_token_hash):
+    if not await verify_refresh_token(payload.refresh_token, session_obj.refresh_token_hash):
         await session_obj.delete()
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
@@ -201,3 +223,10 @@ async def refresh_tokens(request: Request, payload: RefreshRequest):
     ip = request.client.host if request.client else None
     return await _issue_tokens_for_user(user, ua, ip)
 
+
+@router.post("/logout-all")
+async def logout_everywhere(current_user: User = Depends(get_current_user)):
+    """Revoke every refresh session of the current user with a single `delete_many`."""
+
+    result = await Session.find(Session.user_id == current_user.id).delete()
+    return {"revoked": result.deleted_count if result else 0}
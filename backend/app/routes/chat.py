@@ -1,16 +1,50 @@
-from typing import List, Optional
+import json
+import math
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from beanie import PydanticObjectId
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 
-from ..dependencies.auth import get_current_user
+from ..dependencies.auth import get_current_user, get_user_from_token
+from ..dependencies.conditional import chat_history_etag
+from ..dependencies.rate_limit import rate_limit
+from ..metrics import span
 from ..models.analytics import Analytics
 from ..models.chat import Chat
 from ..models.user import User
-from ..services.ai_bot import AIBotError, fetch_ai_reply
+from ..services.ai_bot import AIBotError, AIBotOverloaded, stream_ai_reply
+from ..services.analytics_rollups import record_rollup
+from ..services.chat_export import ExportFormat, export_user_chats
+from ..services.chat_history import InvalidCursor, encode_cursor, fetch_history_page
+from ..services.chat_search import search_chats
+from ..services.conversation_context import get_conversation, record_turn
+from ..services.guardian_alerts import enqueue_alert
+from ..services.idempotency import IdempotencyInProgress, IdempotencyKeyReused, fingerprint, run_idempotent
+from ..services.rate_limit import take_token
+from ..services.reply_cache import fetch_ai_reply_cached
+from ..services.risk import RiskAssessment, get_risk_detector
+from ..services.write_behind import write_behind
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+SEND_LIMITS = [
+    Depends(rate_limit("chat.send.user", per="user")),
+    Depends(rate_limit("chat.send.ip", per="ip")),
+]
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -20,64 +54,282 @@ class ChatResponse(BaseModel):
     reply: str
 
 
+class ChatSearchHit(BaseModel):
+    id: str
+    created_at: datetime
+    score: float
+    message: str
+    message_highlights: List[Tuple[int, int]]
+    reply: str
+    reply_highlights: List[Tuple[int, int]]
+
+
 class ChatHistoryOut(BaseModel):
     id: str
     message: str
     reply: str
+    created_at: datetime
+    cursor: str
 
 
-RISK_KEYWORDS = ["suicide", "kill myself", "harm", "hopeless", "end it"]
+def _detect_risk(user_text: str) -> RiskAssessment:
+    with span("risk.assess"):
+        return get_risk_detector().assess(user_text)
 
 
-@router.post("/send", response_model=ChatResponse)
-async def send_chat(payload: ChatRequest, current_user: Optional[User] = Depends(get_current_user)):
-    user_id = current_user.id if current_user else None
-    user_text = payload.message
+async def _bot_context(user_id: Optional[PydanticObjectId], risk: RiskAssessment) -> dict:
+    return {
+        "user_id": str(user_id) if user_id else None,
+        "risk_flags": risk.flags,
+        "history": await get_conversation(user_id),
+    }
 
-    flags = [kw for kw in RISK_KEYWORDS if kw.lower() in user_text.lower()]
 
-    try:
-        reply_text = await fetch_ai_reply(
-            user_text,
-            context={
-                "user_id": str(user_id) if user_id else None,
-                "risk_flags": flags,
-            },
+async def _record_chat(
+    user_id: Optional[PydanticObjectId],
+    user_text: str,
+    reply_text: str,
+    risk: RiskAssessment,
+) -> None:
+    record_turn(user_id, user_text, reply_text)
+    await write_behind(
+        Chat(
+            user_id=user_id,
+            message=user_text,
+            reply=reply_text,
+            risk_score=risk.score,
+            risk_flags=risk.flags,
+        )
+    )
+    await write_behind(
+        Analytics(
+            user_id=user_id,
+            risk_score=risk.score,
+            flags={"keywords": risk.flags, "categories": risk.categories},
         )
+    )
+    await record_rollup(user_id, risk.score, risk.flags)
+    await enqueue_alert(user_id, risk)
+
+
+async def _send(user_id: Optional[PydanticObjectId], user_text: str) -> ChatResponse:
+    risk = _detect_risk(user_text)
+
+    try:
+        reply_text = await fetch_ai_reply_cached(user_text, context=await _bot_context(user_id, risk))
+    except AIBotOverloaded as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI service busy: {exc}",
+            headers={"Retry-After": "1"},
+        ) from exc
     except AIBotError as exc:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"AI service unavailable: {exc}",
         ) from exc
 
-    risk_score = 0.7 if flags else 0.1
+    await _record_chat(user_id, user_text, reply_text, risk)
 
-    chat_doc = await Chat(
-        user_id=user_id,
-        message=user_text,
-        reply=reply_text,
-        risk_score=risk_score,
-        risk_flags=flags,
-    ).insert()
+    return ChatResponse(reply=reply_text)
 
-    await Analytics(
-        user_id=user_id,
-        risk_score=risk_score,
-        flags={"keywords": flags},
-    ).insert()
 
-    return ChatResponse(reply=reply_text)
+@router.post("/send", response_model=ChatResponse, dependencies=SEND_LIMITS)
+async def send_chat(
+    payload: ChatRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_user: Optional[User] = Depends(get_current_user),
+):
+    user_id = current_user.id if current_user else None
+    user_text = payload.message
+
+    if not idempotency_key or user_id is None:
+        return await _send(user_id, user_text)
+
+    async def handler() -> dict:
+        return (await _send(user_id, user_text)).model_dump()
+
+    try:
+        body, replayed = await run_idempotent(user_id, idempotency_key, fingerprint(user_text), handler)
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different message",
+        )
+    except IdempotencyInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed",
+            headers={"Retry-After": "1"},
+        )
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return ChatResponse(**body)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
-@router.get("/history", response_model=List[ChatHistoryOut])
-async def get_history(current_user: User = Depends(get_current_user)):
-    chats = await Chat.find(Chat.user_id == current_user.id).sort("-created_at").limit(50).to_list()
+@router.post("/stream", dependencies=SEND_LIMITS)
+async def stream_chat(payload: ChatRequest, current_user: User = Depends(get_current_user)):
+    """
+    Server-Sent Events variant of `/send`.
+
+    Emits `token` events as the bot produces them, then a single `done` event
+    with the full reply once it has been stored, or an `error` event if the
+    bot fails mid-stream.
+    """
+
+    user_id = current_user.id
+    user_text = payload.message
+    risk = _detect_risk(user_text)
+
+    async def events() -> AsyncIterator[str]:
+        parts: List[str] = []
+        try:
+            async for token in stream_ai_reply(user_text, context=await _bot_context(user_id, risk)):
+                parts.append(token)
+                yield _sse("token", {"token": token})
+        except AIBotError as exc:
+            yield _sse("error", {"detail": f"AI service unavailable: {exc}"})
+            return
+
+        reply_text = "".join(parts).strip()
+        await _record_chat(user_id, user_text, reply_text, risk)
+        yield _sse("done", {"reply": reply_text})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, token: str):
+    """
+    WebSocket chat. Authenticate with `?token=<access token>`, then send
+    `{"message": "..."}` frames; each reply streams back as `token` frames
+    followed by a `done` frame. Every message draws from the same per-user
+    `chat.send.user` bucket as `/send`.
+    """
+
+    try:
+        current_user = await get_user_from_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    user_id = current_user.id
+
+    try:
+        while True:
+            try:
+                payload = ChatRequest.model_validate(await websocket.receive_json())
+            except (ValidationError, ValueError):
+                await websocket.send_json({"type": "error", "detail": "Expected {\"message\": str}"})
+                continue
+
+            retry_after = await take_token("chat.send.user", f"user:{user_id}")
+            if retry_after is not None:
+                await websocket.send_json(
+                    {"type": "error", "detail": "Too many requests", "retry_after": max(1, math.ceil(retry_after))}
+                )
+                continue
+
+            user_text = payload.message
+            risk = _detect_risk(user_text)
+            parts: List[str] = []
+            try:
+                async for chunk in stream_ai_reply(user_text, context=await _bot_context(user_id, risk)):
+                    parts.append(chunk)
+                    await websocket.send_json({"type": "token", "token": chunk})
+            except AIBotError as exc:
+                await websocket.send_json({"type": "error", "detail": f"AI service unavailable: {exc}"})
+                continue
+
+            reply_text = "".join(parts).strip()
+            await _record_chat(user_id, user_text, reply_text, risk)
+            await websocket.send_json({"type": "done", "reply": reply_text})
+    except WebSocketDisconnect:
+        return
+
+
+@router.get("/history", response_model=List[ChatHistoryOut], dependencies=[Depends(chat_history_etag)])
+async def get_history(
+    before: Optional[str] = Query(None, description="Return chats older than this item cursor"),
+    after: Optional[str] = Query(None, description="Return chats newer than this item cursor"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    One keyset-paginated page of the user's chats.
+
+    With `WRITE_BEHIND_ENABLED`, a chat is stored up to
+    `WRITE_BEHIND_FLUSH_INTERVAL` after its reply is sent, so a page read
+    right after `/send` may not include it yet; the ETag changes once it lands.
+    """
+
+    if before and after:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either 'before' or 'after', not both")
+
+    try:
+        chats = await fetch_history_page(current_user.id, limit, before=before, after=after)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
     return [
         ChatHistoryOut(
             id=str(chat.id),
             message=chat.message,
             reply=chat.reply,
+            created_at=chat.created_at,
+            cursor=encode_cursor(chat.created_at, chat.id),
         )
-        for chat in reversed(chats)
+        for chat in chats
     ]
 
+
+@router.get("/export")
+async def export_history(
+    format: ExportFormat = "ndjson",
+    compress: bool = Query(False, description="gzip the stream on the fly"),
+    current_user: User = Depends(get_current_user),
+):
+    """Download the user's complete chat history as NDJSON or CSV."""
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    filename = f"zenspace-chats.{format}"
+    if compress:
+        media_type, filename = "application/gzip", filename + ".gz"
+
+    return StreamingResponse(
+        export_user_chats(current_user.id, format, compress=compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/search", response_model=List[ChatSearchHit])
+async def search_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1, le=50),
+    page_size: int = Query(20, ge=1, le=50),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Ranked full-text search over the user's messages and replies.
+
+    Snippets are trimmed around the first match; `*_highlights` hold the
+    `[start, end)` offsets of matching words within each snippet. `since` and
+    `until` may carry a timezone; naive values are taken as UTC. Chats moved
+    to the archive (see `ARCHIVE_AFTER_DAYS`) are not searchable.
+    """
+
+    return await search_chats(current_user.id, q, page=page, page_size=page_size, since=since, until=until)
@@ -1,26 +1,28 @@
 from fastapi import APIRouter, Depends
 
 from ..dependencies.auth import get_current_user
+from ..dependencies.conditional import user_etag
 from ..models.user import ParentInfo, User
+from ..responses import model_response
 from ..schemas.auth import UserOut, ParentInput
+from ..services.user_cache import invalidate_user
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 
-@router.get("/me", response_model=UserOut)
+@router.get("/me", response_model=UserOut, dependencies=[Depends(user_etag)])
 async def get_me(current_user: User = Depends(get_current_user)):
-    data = current_user.model_dump(by_alias=True)
-    data["_id"] = str(current_user.id)
-    data["parent"] = ParentInput(**current_user.parent.model_dump())
-    return UserOut(**data)
+    return model_response(UserOut.from_user(current_user))
 
 
 @router.put("/me/parent", response_model=UserOut)
 async def update_parent(parent: ParentInput, current_user: User = Depends(get_current_user)):
-    current_user.parent = ParentInfo(**parent.model_dump())
-    await current_user.save()
-    data = current_user.model_dump(by_alias=True)
-    data["_id"] = str(current_user.id)
-    data["parent"] = parent
-    return UserOut(**data)
+    # `current_user` may be the cached instance shared with other requests; a failed save must not leak into it.
+    user = current_user.model_copy(deep=True)
+    user.parent = ParentInfo(**parent.model_dump())
+    try:
+        await user.save()
+    finally:
+        await invalidate_user(user.id)
+    return model_response(UserOut.from_user(user))
 
@@ -1,8 +1,13 @@
+from __future__ import annotations
+
 from datetime import datetime
-from typing import Optional, Literal
+from typing import TYPE_CHECKING, Optional, Literal
 
 from pydantic import BaseModel, EmailStr, Field
 
+if TYPE_CHECKING:
+    from ..models.user import User
+
 
 class ParentInput(BaseModel):
     name: Optional[str] = None
@@ -50,6 +55,22 @@ class UserOut(BaseModel):
     class Config:
         populate_by_name = True
 
+    @classmethod
+    def from_user(cls, user: User) -> UserOut:
+        """Build from a stored `User` without re-validating fields that were validated on load."""
+
+        parent = user.parent
+        return cls.model_construct(
+            id=str(user.id),
+            name=user.name,
+            email=user.email,
+            firstName=user.name.split(" ")[0] if user.name else user.name,
+            authProvider=user.authProvider,
+            parent=ParentInput.model_construct(name=parent.name, email=parent.email, phone=parent.phone),
+            createdAt=user.createdAt,
+            updatedAt=user.updatedAt,
+        )
+
 
 class AuthResponse(BaseModel):
     user: UserOut
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from beanie import PydanticObjectId
+
+from app.config import get_settings
+from app.models.admin_analytics import CohortFlagSummary, CohortWeekSummary, UserRiskTrend
+from app.models.analytics_rollup import AnalyticsRollup
+from app.models.user import User
+from app.services.analytics_rollups import period_start
+
+logger = logging.getLogger(__name__)
+
+# Rollup flushes stamp `updated_at` just before their write lands, so each run
+# re-reads a short overlap rather than trusting the previous start time exactly.
+WATERMARK_OVERLAP = timedelta(seconds=30)
+USER_BATCH = 1000
+
+
+def _merge(into: str, on: List[str]) -> Dict[str, Any]:
+    return {"$merge": {"into": into, "on": on, "whenMatched": "merge", "whenNotMatched": "insert"}}
+
+
+def trend_pipeline(
+    week: datetime,
+    user_ids: Optional[List[PydanticObjectId]],
+    *,
+    threshold: float,
+    min_messages: int,
+    base_score: float,
+    now: datetime,
+) -> List[Dict[str, Any]]:
+    """
+    Compare each user's weekly rollup for `week` with the week before and
+    `$merge` the result into `admin_user_risk_trends`.
+
+    Only users active in `week` get a trend document. A user with no activity
+    the week before is compared against `base_score`, the floor every message
+    is scored at.
+    """
+
+    match: Dict[str, Any] = {"period": "week", "period_start": {"$in": [week - timedelta(weeks=1), week]}}
+    if user_ids is not None:
+        match["user_id"] = {"$in": user_ids}
+    current = {"$eq": ["$period_start", week]}
+
+    def this_week(field: str) -> Dict[str, Any]:
+        return {"$cond": [current, field, 0]}
+
+    def last_week(field: str) -> Dict[str, Any]:
+        return {"$cond": [current, 0, field]}
+
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": "$user_id",
+                "messages": {"$sum": this_week("$count")},
+                "risk_sum": {"$sum": this_week("$risk_sum")},
+                "max_risk": {"$max": this_week("$risk_max")},
+                "prev_messages": {"$sum": last_week("$count")},
+                "prev_risk_sum": {"$sum": last_week("$risk_sum")},
+                "flag_counts": {"$mergeObjects": {"$cond": [current, "$flag_counts", {}]}},
+            }
+        },
+        {"$match": {"messages": {"$gt": 0}}},
+        {
+            "$lookup": {
+                "from": User.Settings.name,
+                "localField": "_id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": {"_id": 0, "createdAt": 1}}],
+                "as": "user",
+            }
+        },
+        {
+            "$set": {
+                "mean_risk": {"$divide": ["$risk_sum", "$messages"]},
+                "prev_mean_risk": {
+                    "$cond": [
+                        {"$gt": ["$prev_messages", 0]},
+                        {"$divide": ["$prev_risk_sum", "$prev_messages"]},
+                        base_score,
+                    ]
+                },
+                "cohort": {
+                    "$ifNull": [
+                        {"$dateToString": {"format": "%Y-%m", "date": {"$first": "$user.createdAt"}}},
+                        "unknown",
+                    ]
+                },
+            }
+        },
+        {"$set": {"delta": {"$subtract": ["$mean_risk", "$prev_mean_risk"]}}},
+        {
+            "$project": {
+                "_id": 0,
+                "user_id": "$_id",
+                "week_start": {"$literal": week},
+                "cohort": 1,
+                "messages": 1,
+                "mean_risk": 1,
+                "max_risk": 1,
+                "prev_messages": 1,
+                "prev_mean_risk": 1,
+                "delta": 1,
+                "rising": {"$and": [{"$gte": ["$delta", threshold]}, {"$gte": ["$messages", min_messages]}]},
+                "flag_counts": 1,
+                "refreshed_at": {"$literal": now},
+            }
+        },
+        _merge(UserRiskTrend.Settings.name, ["user_id", "week_start"]),
+    ]
+
+
+def cohort_week_pipeline(week: datetime, now: datetime) -> List[Dict[str, Any]]:
+    """Per-cohort activity for `week`, computed from the user trend documents."""
+
+    return [
+        {"$match": {"week_start": week}},
+        {
+            "$group": {
+                "_id": "$cohort",
+                "messages": {"$sum": "$messages"},
+                "active_users": {"$sum": 1},
+                "rising_users": {"$sum": {"$cond": ["$rising", 1, 0]}},
+                "risk_sum": {"$sum": {"$multiply": ["$mean_risk", "$messages"]}},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "cohort": "$_id",
+                "week_start": {"$literal": week},
+                "messages": 1,
+                "active_users": 1,
+                "rising_users": 1,
+                "mean_risk": {"$divide": ["$risk_sum", {"$max": ["$messages", 1]}]},
+                "refreshed_at": {"$literal": now},
+            }
+        },
+        _merge(CohortWeekSummary.Settings.name, ["week_start", "cohort"]),
+    ]
+
+
+def cohort_flag_pipeline(week: datetime, now: datetime) -> List[Dict[str, Any]]:
+    """
+    Per-cohort flag frequencies for `week`, computed from the user trend
+    documents. Run after `cohort_week_pipeline`; message totals come from there.
+    """
+
+    return [
+        {"$match": {"week_start": week}},
+        {"$project": {"_id": 0, "cohort": 1, "flags": {"$objectToArray": {"$ifNull": ["$flag_counts", {}]}}}},
+        {"$unwind": "$flags"},
+        {
+            "$group": {
+                "_id": {"cohort": "$cohort", "flag": "$flags.k"},
+                "occurrences": {"$sum": "$flags.v"},
+                "users_flagged": {"$sum": 1},
+            }
+        },
+        {
+            "$lookup": {
+                "from": CohortWeekSummary.Settings.name,
+                "let": {"cohort": "$_id.cohort"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [{"$eq": ["$week_start", week]}, {"$eq": ["$cohort", "$$cohort"]}]}}},
+                    {"$project": {"_id": 0, "messages": 1}},
+                ],
+                "as": "totals",
+            }
+        },
+        {"$set": {"messages": {"$ifNull": [{"$first": "$totals.messages"}, 0]}}},
+        {
+            "$project": {
+                "_id": 0,
+                "cohort": "$_id.cohort",
+                "week_start": {"$literal": week},
+                "flag": "$_id.flag",
+                "occurrences": 1,
+                "users_flagged": 1,
+                "messages": 1,
+                "frequency": {"$divide": ["$occurrences", {"$max": ["$messages", 1]}]},
+                "refreshed_at": {"$literal": now},
+            }
+        },
+        _merge(CohortFlagSummary.Settings.name, ["week_start", "cohort", "flag"]),
+    ]
+
+
+async def _run_pipeline(collection: Any, pipeline: List[Dict[str, Any]]) -> None:
+    # `$merge` produces no output documents; the cursor only has to be drained.
+    await collection.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+
+
+async def refresh_week(
+    week: datetime,
+    user_ids: Optional[List[PydanticObjectId]] = None,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Re-materialize the summaries for `week`.
+
+    With `user_ids`, only those users' trend documents are recomputed (in
+    batches); the cohort summaries are always rebuilt from the trend
+    collection, which holds one document per user active that week.
+
+    Returns:
+        The number of users whose trends were recomputed, or -1 for all.
+    """
+
+    settings = get_settings()
+    now = now or datetime.utcnow()
+    rollups = AnalyticsRollup.get_motor_collection()
+    options = dict(
+        threshold=settings.admin_rising_threshold,
+        min_messages=settings.admin_rising_min_messages,
+        base_score=settings.risk_base_score,
+        now=now,
+    )
+
+    if user_ids is None:
+        await _run_pipeline(rollups, trend_pipeline(week, None, **options))
+    else:
+        for offset in range(0, len(user_ids), USER_BATCH):
+            await _run_pipeline(rollups, trend_pipeline(week, user_ids[offset : offset + USER_BATCH], **options))
+
+    trends = UserRiskTrend.get_motor_collection()
+    await _run_pipeline(trends, cohort_week_pipeline(week, now))
+    await _run_pipeline(trends, cohort_flag_pipeline(week, now))
+    return -1 if user_ids is None else len(user_ids)
+
+
+async def changed_users(week: datetime, since: datetime) -> List[PydanticObjectId]:
+    """Users whose weekly rollup for `week` or the week before changed after `since`."""
+
+    cursor = AnalyticsRollup.get_motor_collection().aggregate(
+        [
+            {
+                "$match": {
+                    "period": "week",
+                    "period_start": {"$in": [week - timedelta(weeks=1), week]},
+                    "updated_at": {"$gt": since},
+                }
+            },
+            {"$group": {"_id": "$user_id"}},
+        ]
+    )
+    return [doc["_id"] async for doc in cursor]
+
+
+async def last_refreshed(week: datetime) -> Optional[datetime]:
+    """When `week` was last materialized; read from the (small) cohort summary collection."""
+
+    doc = await CohortWeekSummary.get_motor_collection().find_one(
+        {"week_start": week}, projection={"_id": 0, "refreshed_at": 1}, sort=[("refreshed_at", -1)]
+    )
+    return doc["refreshed_at"] if doc else None
+
+
+_refresh_lock = asyncio.Lock()
+
+
+async def refresh_admin_analytics() -> Dict[str, Any]:
+    """
+    Bring the summaries for the current week up to date.
+
+    The watermark is the `refreshed_at` stamp of the previous run, so this is
+    incremental across restarts and when driven from cron. The first run of a
+    week recomputes every active user (everyone's comparison week moved) after
+    settling the previous week with whatever arrived since its last run.
+    """
+
+    async with _refresh_lock:
+        started = datetime.utcnow()
+        week = period_start(started, "week")
+        since = await last_refreshed(week)
+
+        if since is None:
+            previous = week - timedelta(weeks=1)
+            previous_since = await last_refreshed(previous)
+            if previous_since is not None:
+                changed = await changed_users(previous, previous_since - WATERMARK_OVERLAP)
+                if changed:
+                    await refresh_week(previous, changed, now=started)
+            users = await refresh_week(week, now=started)
+        else:
+            changed = await changed_users(week, since - WATERMARK_OVERLAP)
+            users = await refresh_week(week, changed, now=started) if changed else 0
+
+        return {"week_start": week, "users": users, "full": users == -1}
+
+
+class AdminAnalyticsRefresher:
+    """Run `refresh_admin_analytics` every `interval` seconds."""
+
+    def __init__(self, interval: float = 300.0) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="admin-analytics")
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await refresh_admin_analytics()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Admin analytics refresh failed")
+            await asyncio.sleep(self.interval)
+
+
+_refresher: Optional[AdminAnalyticsRefresher] = None
+
+
+async def init_admin_analytics() -> None:
+    """
+    Start the scheduled refresh if `ADMIN_ANALYTICS_REFRESH_INTERVAL` is set.
+
+    Enable it in one process only; with several workers, run
+    `python -m app.commands.refresh_admin_analytics` from cron instead.
+    """
+
+    global _refresher
+    interval = get_settings().admin_analytics_refresh_interval
+    if _refresher is not None or interval <= 0:
+        return
+
+    _refresher = AdminAnalyticsRefresher(interval=interval)
+    _refresher.start()
+
+
+async def close_admin_analytics() -> None:
+    """Stop the scheduled refresh; call on shutdown."""
+
+    global _refresher
+    if _refresher is None:
+        return
+
+    refresher, _refresher = _refresher, None
+    await refresher.close()
+
+
+async def rebuild_admin_analytics(weeks: int = 12) -> int:
+    """
+    Recompute the summaries for the current week and the `weeks - 1` before it.
+
+    Returns:
+        The number of weeks rebuilt.
+    """
+
+    current = period_start(datetime.utcnow(), "week")
+    for back in range(weeks - 1, -1, -1):
+        await refresh_week(current - timedelta(weeks=back))
+    return weeks
@@ -1,20 +1,163 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.metrics import register_stats, span
+from app.services.bot_pool import EndpointPool, NoHealthyEndpoint, PoolOverloaded
+
+_client: httpx.AsyncClient | None = None
+_pool: EndpointPool | None = None
+_stream_pool: EndpointPool | None = None
 
 
 class AIBotError(RuntimeError):
     """Raised when the external AI bot fails to return a usable response."""
 
 
+class AIBotUnavailable(AIBotError):
+    """The bot could not be reached or answered with a 5xx; safe to retry elsewhere."""
+
+
+class AIBotOverloaded(AIBotError):
+    """Too many bot calls are already in flight; the request was shed without being sent."""
+
+
+def build_ai_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Build an `httpx.AsyncClient` configured from the AI bot settings.
+
+    The read timeout is `ai_bot_timeout`; connecting gets its own, shorter budget
+    so an unreachable bot fails fast instead of holding the request for the full
+    generation timeout.
+    """
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.ai_bot_timeout, connect=settings.ai_bot_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.ai_bot_max_connections,
+            max_keepalive_connections=settings.ai_bot_max_keepalive,
+            keepalive_expiry=settings.ai_bot_keepalive_expiry,
+        ),
+        http2=settings.ai_bot_http2,
+    )
+
+
+def bot_endpoints(settings: Settings) -> List[str]:
+    """Return the configured bot URLs: `AI_BOT_URLS` (comma-separated) or the single `AI_BOT_URL`."""
+
+    urls = [url.strip() for url in settings.ai_bot_urls.split(",") if url.strip()]
+    return urls or [settings.ai_bot_url]
+
+
+def build_bot_pool(settings: Settings, urls: Optional[List[str]] = None) -> EndpointPool:
+    return EndpointPool(
+        urls or bot_endpoints(settings),
+        retryable=lambda exc: isinstance(exc, AIBotUnavailable),
+        max_retries=settings.ai_bot_max_retries,
+        backoff=settings.ai_bot_retry_backoff,
+        failure_threshold=settings.ai_bot_breaker_failures,
+        reset_timeout=settings.ai_bot_breaker_reset,
+        hedge_percentile=settings.ai_bot_hedge_percentile,
+        hedge_min_samples=settings.ai_bot_hedge_min_samples,
+        max_concurrency=settings.ai_bot_max_concurrency,
+    )
+
+
+async def init_ai_client() -> None:
+    """
+    Create the shared, pooled AI bot client and the endpoint balancer.
+
+    This function should be invoked once on application startup, alongside
+    `init_db`, so every chat request reuses the same keep-alive connections.
+    """
+
+    global _client, _pool, _stream_pool
+    if _client is not None:
+        return
+
+    settings = get_settings()
+    _client = build_ai_client(settings)
+    _pool = build_bot_pool(settings)
+    if settings.ai_bot_stream_url:
+        _stream_pool = build_bot_pool(settings, [settings.ai_bot_stream_url])
+
+
+async def close_ai_client() -> None:
+    """Close the shared AI bot client and release its pooled connections."""
+
+    global _client
+    if _client is None:
+        return
+
+    client, _client = _client, None
+    await client.aclose()
+
+
+def get_ai_client() -> httpx.AsyncClient:
+    """
+    Retrieve the shared AI bot client, creating it lazily if needed.
+
+    Lazy creation keeps scripts and one-off callers working when the FastAPI
+    startup hook has not run.
+    """
+
+    global _client
+    if _client is None:
+        _client = build_ai_client(get_settings())
+    return _client
+
+
+def get_bot_pool() -> EndpointPool:
+    global _pool
+    if _pool is None:
+        _pool = build_bot_pool(get_settings())
+    return _pool
+
+
+def get_stream_pool() -> EndpointPool:
+    """
+    Pool used for streaming calls: a dedicated one for `AI_BOT_STREAM_URL`
+    when that is set, so its failures trip its own breaker, else the main pool.
+    """
+
+    global _stream_pool
+    settings = get_settings()
+    if not settings.ai_bot_stream_url:
+        return get_bot_pool()
+    if _stream_pool is None:
+        _stream_pool = build_bot_pool(settings, [settings.ai_bot_stream_url])
+    return _stream_pool
+
+
+def bot_pool_stats() -> Dict[str, Any]:
+    stats = get_bot_pool().stats()
+    if _stream_pool is not None:
+        stats["stream"] = _stream_pool.stats()
+    return stats
+
+
+def _raise_for_unavailable(response: httpx.Response) -> None:
+    if response.status_code < 500:
+        return
+    try:
+        detail = response.json().get("error")
+    except ValueError:
+        detail = None
+    raise AIBotUnavailable(detail or f"AI service error {response.status_code}")
+
+
 async def fetch_ai_reply(message: str, context: Optional[Dict[str, Any]] = None) -> str:
     """
     Call the external AI bot (Flask `app.py`) and return its reply string.
 
+    Calls are spread over the configured endpoints by `EndpointPool`, which
+    also applies circuit breaking, retries and hedging, all within an overall
+    `AI_BOT_DEADLINE`.
+
     Args:
         message: The user's message text.
         context: Optional metadata to forward (e.g., user info).
@@ -23,20 +166,35 @@ async def fetch_ai_reply(message: str, context: Optional[Dict[str, Any]] = None)
         The reply string produced by the AI bot.
 
     Raises:
+        AIBotOverloaded: If the concurrency limit is reached.
         AIBotError: If the downstream service fails or returns invalid data.
     """
 
-    settings = get_settings()
     payload: Dict[str, Any] = {"message": message}
     if context:
         payload["context"] = context
 
+    async def send(url: str) -> str:
+        try:
+            response = await get_ai_client().post(url, json=payload)
+        except httpx.HTTPError as exc:
+            raise AIBotUnavailable(f"Failed to reach AI service: {exc}") from exc
+        _raise_for_unavailable(response)
+        return _parse_reply(response)
+
+    deadline = get_settings().ai_bot_deadline
     try:
-        async with httpx.AsyncClient(timeout=settings.ai_bot_timeout) as client:
-            response = await client.post(settings.ai_bot_url, json=payload)
-    except httpx.HTTPError as exc:
-        raise AIBotError(f"Failed to reach AI service: {exc}") from exc
+        with span("ai_bot.fetch"):
+            return await get_bot_pool().call(send, deadline=deadline)
+    except TimeoutError as exc:
+        raise AIBotUnavailable(f"AI service did not answer within {deadline:g}s") from exc
+    except PoolOverloaded as exc:
+        raise AIBotOverloaded(str(exc)) from exc
+    except NoHealthyEndpoint as exc:
+        raise AIBotUnavailable(str(exc)) from exc
+
 
+def _parse_reply(response: httpx.Response) -> str:
     try:
         data = response.json()
     except ValueError as exc:
@@ -52,3 +210,90 @@ async def fetch_ai_reply(message: str, context: Optional[Dict[str, Any]] = None)
     return reply.strip()
 
 
+def _parse_sse_data(data: str) -> str:
+    """Extract the token from one SSE `data:` payload (JSON object or raw text)."""
+
+    try:
+        parsed = json.loads(data)
+    except ValueError:
+        return data
+    if isinstance(parsed, dict):
+        if parsed.get("error"):
+            raise AIBotError(str(parsed["error"]))
+        token = parsed.get("token", parsed.get("reply", ""))
+        return token if isinstance(token, str) else ""
+    return parsed if isinstance(parsed, str) else ""
+
+
+async def stream_ai_reply(message: str, context: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    """
+    Call the external AI bot in streaming mode and yield reply tokens as they arrive.
+
+    The bot is asked for `text/event-stream`; each `data:` line is forwarded as a
+    token until `[DONE]` or the end of the stream. Bots that ignore the request
+    and answer with the usual JSON body are supported by yielding the whole
+    reply as a single token. Streams are balanced and circuit-broken like
+    `fetch_ai_reply` but never retried or hedged, since tokens may already
+    have reached the client.
+
+    Raises:
+        AIBotError: If the downstream service fails or returns invalid data.
+    """
+
+    payload: Dict[str, Any] = {"message": message, "stream": True}
+    if context:
+        payload["context"] = context
+
+    pool = get_stream_pool()
+    try:
+        pool.enter()
+    except PoolOverloaded as exc:
+        raise AIBotOverloaded(str(exc)) from exc
+
+    try:
+        try:
+            endpoint = pool.acquire()
+        except NoHealthyEndpoint as exc:
+            raise AIBotUnavailable(str(exc)) from exc
+
+        error: Optional[BaseException] = None
+        try:
+            async with get_ai_client().stream(
+                "POST",
+                endpoint.url,
+                json=payload,
+                headers={"Accept": "text/event-stream"},
+            ) as response:
+                if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                    await response.aread()
+                    _raise_for_unavailable(response)
+                    yield _parse_reply(response)
+                    return
+
+                if not response.is_success:
+                    raise AIBotUnavailable(f"AI service error {response.status_code}")
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:]
+                    if data.startswith(" "):
+                        data = data[1:]
+                    if data == "[DONE]":
+                        return
+                    token = _parse_sse_data(data)
+                    if token:
+                        yield token
+        except httpx.HTTPError as exc:
+            error = AIBotUnavailable(f"Failed to reach AI service: {exc}")
+            raise error from exc
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            pool.release(endpoint, error)
+    finally:
+        pool.exit()
+
+
+register_stats("ai_bot_pool", bot_pool_stats)
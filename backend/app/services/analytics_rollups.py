@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from beanie import PydanticObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
+from app.dates import to_naive_utc
+from app.models.analytics import Analytics
+from app.models.analytics_rollup import AnalyticsRollup
+from app.models.archive import ArchiveSegment
+from app.services.archive import archived_ids, iter_archived, month_start
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("day", "week")
+
+RollupKey = Tuple[PydanticObjectId, str, datetime]
+
+# Tokens of the last few flushes kept on each rollup, so a retried flush can tell whether it already landed.
+FLUSH_TOKENS_KEPT = 16
+
+
+def period_start(at: datetime, period: str) -> datetime:
+    day = to_naive_utc(at).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _flag_key(flag: str) -> str:
+    # Mongo field names may not contain dots or start with '$'.
+    return flag.replace(".", "_").lstrip("$") or "_"
+
+
+@dataclass
+class _Delta:
+    count: int = 0
+    risk_sum: float = 0.0
+    risk_max: float = 0.0
+    flags: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, risk_score: float, flags: Iterable[str]) -> None:
+        self.count += 1
+        self.risk_sum += risk_score
+        self.risk_max = max(self.risk_max, risk_score)
+        for flag in flags:
+            key = _flag_key(flag)
+            self.flags[key] = self.flags.get(key, 0) + 1
+
+
+def _increment_ops(deltas: Dict[RollupKey, _Delta], token: str) -> List[UpdateOne]:
+    now = datetime.utcnow()
+    ops = []
+    for (user_id, period, start), delta in deltas.items():
+        inc = {"count": delta.count, "risk_sum": delta.risk_sum}
+        inc.update({f"flag_counts.{flag}": n for flag, n in delta.flags.items()})
+        ops.append(
+            UpdateOne(
+                {"user_id": user_id, "period": period, "period_start": start, "flushes": {"$ne": token}},
+                {
+                    "$inc": inc,
+                    "$max": {"risk_max": delta.risk_max},
+                    "$set": {"updated_at": now},
+                    "$push": {"flushes": {"$each": [token], "$slice": -FLUSH_TOKENS_KEPT}},
+                },
+                upsert=True,
+            )
+        )
+    return ops
+
+
+class RollupAccumulator:
+    """
+    Collect per-user rollup increments in memory and apply them with one
+    unordered `bulk_write` every `flush_interval` seconds.
+
+    Increments for the same user and period are merged before writing, so a
+    busy user costs one update per period per flush, not one per message.
+
+    Each flush stamps its token on the rollups it updates and skips rollups
+    already carrying it. A failed flush is retried with the same token, so
+    updates that landed before the failure are not applied twice.
+    """
+
+    def __init__(self, flush_interval: float = 1.0) -> None:
+        self.flush_interval = flush_interval
+        self._deltas: Dict[RollupKey, _Delta] = {}
+        # (token, deltas) of flushes that did not fully land, retried on the next flush.
+        self._unacked: List[Tuple[str, Dict[RollupKey, _Delta]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="analytics-rollups")
+
+    def add(self, user_id: PydanticObjectId, risk_score: float, flags: Iterable[str], at: datetime) -> None:
+        flags = list(flags)
+        for period in PERIODS:
+            key = (user_id, period, period_start(at, period))
+            self._deltas.setdefault(key, _Delta()).add(risk_score, flags)
+
+    async def flush(self) -> None:
+        batches = [(token, deltas, True) for token, deltas in self._unacked]
+        self._unacked = []
+        if self._deltas:
+            batches.append((uuid.uuid4().hex, self._deltas, False))
+            self._deltas = {}
+        for token, deltas, retry in batches:
+            await self._apply(token, deltas, retry)
+
+    async def _apply(self, token: str, deltas: Dict[RollupKey, _Delta], retry: bool) -> None:
+        keys = list(deltas)
+        try:
+            await AnalyticsRollup.get_motor_collection().bulk_write(_increment_ops(deltas, token), ordered=False)
+            return
+        except BulkWriteError as exc:
+            # Unordered: only the reported updates failed. On a retry the rollup exists, so a duplicate key
+            # means the token filter skipped it: that update landed before. On a first attempt it is a lost
+            # upsert race and must be retried.
+            failed = [
+                keys[error["index"]]
+                for error in exc.details.get("writeErrors", [])
+                if not (retry and error.get("code") == 11000)
+            ]
+            if failed:
+                logger.error("Failed to apply %d of %d analytics rollup updates; retrying", len(failed), len(keys))
+        except Exception:
+            failed = keys
+            logger.exception("Failed to apply %d analytics rollup updates; retrying", len(keys))
+        if failed:
+            self._unacked.append((token, {key: deltas[key] for key in failed}))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.shield(self.flush())
+
+
+_accumulator: Optional[RollupAccumulator] = None
+
+
+async def init_rollups() -> None:
+    """Start the rollup flusher; call on application startup after `init_db`."""
+
+    global _accumulator
+    if _accumulator is not None:
+        return
+
+    _accumulator = RollupAccumulator(flush_interval=get_settings().rollup_flush_interval)
+    _accumulator.start()
+
+
+async def close_rollups() -> None:
+    """Apply pending increments and stop the flusher; call on shutdown."""
+
+    global _accumulator
+    if _accumulator is None:
+        return
+
+    accumulator, _accumulator = _accumulator, None
+    await accumulator.close()
+
+
+async def record_rollup(
+    user_id: Optional[PydanticObjectId],
+    risk_score: float,
+    flags: Iterable[str],
+    at: Optional[datetime] = None,
+) -> None:
+    """Count one message towards the user's daily and weekly rollups."""
+
+    if user_id is None:
+        return
+    at = at or datetime.utcnow()
+    if _accumulator is None:
+        single = RollupAccumulator()
+        single.add(user_id, risk_score, flags, at)
+        await single.flush()
+        return
+    _accumulator.add(user_id, risk_score, flags, at)
+
+
+async def backfill_rollups(batch_size: int = 1000) -> int:
+    """
+    Rebuild every rollup from the raw `Analytics` collection and its archive.
+
+    Totals are computed in memory and written with `$set`, so the command is
+    idempotent. Run it while `send_chat` traffic is stopped (or before
+    deploying live rollups); increments applied during the scan would be
+    overwritten.
+
+    Returns:
+        The number of rollup documents written.
+    """
+
+    totals: Dict[RollupKey, _Delta] = {}
+
+    def add(doc: Dict[str, Any]) -> None:
+        flags = (doc.get("flags") or {}).get("keywords") or []
+        for period in PERIODS:
+            key = (doc["user_id"], period, period_start(doc["date"], period))
+            totals.setdefault(key, _Delta()).add(doc.get("risk_score", 0.0), flags)
+
+    archived_months: Set[Tuple[PydanticObjectId, datetime]] = set()
+    archived_users = await ArchiveSegment.get_motor_collection().distinct(
+        "user_id", {"kind": "analytics", "user_id": {"$ne": None}}
+    )
+    for user_id in archived_users:
+        async for doc in iter_archived(user_id, "analytics"):
+            archived_months.add((user_id, month_start(doc["date"])))
+            add(doc)
+
+    # Archiving copies before it deletes, so after a crash a live document may also be in the archive.
+    suspects: Dict[Tuple[PydanticObjectId, datetime], List[Dict[str, Any]]] = defaultdict(list)
+    cursor = Analytics.get_motor_collection().find(
+        {"user_id": {"$ne": None}},
+        projection={"user_id": 1, "date": 1, "risk_score": 1, "flags.keywords": 1},
+        batch_size=batch_size,
+    )
+    async for doc in cursor:
+        month = (doc["user_id"], month_start(doc["date"]))
+        if month in archived_months:
+            suspects[month].append(doc)
+        else:
+            add(doc)
+    for (user_id, month), docs in suspects.items():
+        already = await archived_ids(user_id, "analytics", month)
+        for doc in docs:
+            if doc["_id"] not in already:
+                add(doc)
+
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"user_id": user_id, "period": period, "period_start": start},
+            {
+                "$set": {
+                    "count": delta.count,
+                    "risk_sum": delta.risk_sum,
+                    "risk_max": delta.risk_max,
+                    "flag_counts": delta.flags,
+                    "updated_at": now,
+                }
+            },
+            upsert=True,
+        )
+        for (user_id, period, start), delta in totals.items()
+    ]
+    collection = AnalyticsRollup.get_motor_collection()
+    for offset in range(0, len(ops), batch_size):
+        await collection.bulk_write(ops[offset : offset + batch_size], ordered=False)
+    return len(ops)
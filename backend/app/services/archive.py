@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Type
+
+import bson
+from beanie import Document, PydanticObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from app.config import get_settings
+from app.dates import to_naive_utc
+from app.models.analytics import Analytics
+from app.models.archive import ArchiveSegment
+from app.models.chat import Chat
+from app.models.user import User
+from app.services.cache import TTLCache
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# kind -> (model, timestamp field)
+SOURCES: Dict[str, Tuple[Type[Document], str]] = {
+    "chats": (Chat, "created_at"),
+    "analytics": (Analytics, "date"),
+}
+
+_settings = get_settings()
+_months: TTLCache[Tuple[Any, ...], List[Dict[str, Any]]] = TTLCache(
+    maxsize=_settings.archive_cache_size, ttl=_settings.archive_cache_ttl
+)
+
+
+def month_start(at: datetime) -> datetime:
+    return to_naive_utc(at).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def pack(docs: List[Dict[str, Any]], codec: str) -> bytes:
+    """BSON-encode `docs` (keeping datetimes and ObjectIds intact) and compress them."""
+
+    raw = bson.encode({"items": docs})
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    return zlib.compress(raw, 9)
+
+
+def unpack(blob: bytes, codec: str) -> List[Dict[str, Any]]:
+    raw = zstandard.ZstdDecompressor().decompress(blob) if codec == "zstd" else zlib.decompress(blob)
+    return bson.decode(raw)["items"]
+
+
+async def _load_month(segments: List[Dict[str, Any]], time_field: str) -> List[Dict[str, Any]]:
+    # Segments never change once written, so their ids are a safe cache key.
+    key = tuple(segment["_id"] for segment in segments)
+    docs = _months.get(key)
+    if docs is None:
+        docs = []
+        for segment in segments:
+            docs.extend(await asyncio.to_thread(unpack, segment["blob"], segment["codec"]))
+        docs.sort(key=lambda doc: (doc[time_field], doc["_id"]))
+        _months.set(key, docs)
+    return docs
+
+
+async def iter_archived(
+    user_id: Optional[PydanticObjectId],
+    kind: str = "chats",
+    *,
+    descending: bool = False,
+    after: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield a user's archived documents in `(timestamp, _id)` order.
+
+    `after`/`before` only prune whole segments by their time range (both
+    inclusive); callers apply exact bounds themselves. Months are
+    decompressed one at a time and kept in a small LRU, so paging back through
+    one month does not inflate it again for every page.
+    """
+
+    _, time_field = SOURCES[kind]
+    query: Dict[str, Any] = {"user_id": user_id, "kind": kind}
+    if after is not None:
+        query["last_at"] = {"$gte": after}
+    if before is not None:
+        query["first_at"] = {"$lte": before}
+    direction = DESCENDING if descending else ASCENDING
+    cursor = (
+        ArchiveSegment.get_motor_collection()
+        .find(query, projection={"month": 1, "codec": 1, "blob": 1})
+        .sort([("month", direction), ("part", ASCENDING)])
+    )
+
+    month: Optional[datetime] = None
+    segments: List[Dict[str, Any]] = []
+    async for segment in cursor:
+        if segments and segment["month"] != month:
+            for doc in _ordered(await _load_month(segments, time_field), descending):
+                yield doc
+            segments = []
+        month = segment["month"]
+        segments.append(segment)
+    if segments:
+        for doc in _ordered(await _load_month(segments, time_field), descending):
+            yield doc
+
+
+def _ordered(docs: List[Dict[str, Any]], descending: bool) -> Any:
+    return reversed(docs) if descending else iter(docs)
+
+
+async def archived_ids(
+    user_id: Optional[PydanticObjectId],
+    kind: str,
+    month: datetime,
+    first_at: Optional[datetime] = None,
+    last_at: Optional[datetime] = None,
+) -> Set[Any]:
+    """Ids archived in a user's month, only from parts overlapping `[first_at, last_at]` when given."""
+
+    query: Dict[str, Any] = {"user_id": user_id, "kind": kind, "month": month}
+    if first_at is not None:
+        query["last_at"] = {"$gte": first_at}
+    if last_at is not None:
+        query["first_at"] = {"$lte": last_at}
+    cursor = ArchiveSegment.get_motor_collection().find(query, projection={"codec": 1, "blob": 1})
+    ids: Set[Any] = set()
+    async for segment in cursor:
+        docs = await asyncio.to_thread(unpack, segment["blob"], segment["codec"])
+        ids.update(doc["_id"] for doc in docs)
+    return ids
+
+
+async def _append_segment(
+    user_id: Optional[PydanticObjectId],
+    kind: str,
+    month: datetime,
+    docs: List[Dict[str, Any]],
+    codec: str,
+) -> int:
+    """
+    Write `docs` as a new part of the user's month, then delete the originals.
+
+    Documents already present in an earlier part (left behind by a run that
+    died between the two steps) are not archived twice, only deleted. Only
+    parts whose time range overlaps `docs` can hold them, so normally at most
+    one earlier part is decompressed.
+    """
+
+    model, time_field = SOURCES[kind]
+    ids = [doc["_id"] for doc in docs]
+    already = await archived_ids(user_id, kind, month, docs[0][time_field], docs[-1][time_field])
+    fresh = [doc for doc in docs if doc["_id"] not in already]
+
+    if fresh:
+        collection = ArchiveSegment.get_motor_collection()
+        last = await collection.find_one(
+            {"user_id": user_id, "kind": kind, "month": month}, projection={"part": 1}, sort=[("part", -1)]
+        )
+        raw_size = len(bson.encode({"items": fresh}))
+        blob = await asyncio.to_thread(pack, fresh, codec)
+        await collection.insert_one(
+            {
+                "user_id": user_id,
+                "kind": kind,
+                "month": month,
+                "part": last["part"] + 1 if last else 0,
+                "codec": codec,
+                "count": len(fresh),
+                "first_at": fresh[0][time_field],
+                "last_at": fresh[-1][time_field],
+                "raw_size": raw_size,
+                "blob": bson.Binary(blob),
+                "archived_at": datetime.utcnow(),
+            }
+        )
+
+    await model.get_motor_collection().delete_many({"_id": {"$in": ids}})
+    return len(fresh)
+
+
+async def archive_user(
+    user_id: Optional[PydanticObjectId],
+    kind: str,
+    cutoff: datetime,
+    *,
+    codec: str = "zlib",
+    segment_size: int = 2000,
+) -> int:
+    """Archive one user's documents of `kind` older than `cutoff`; returns how many."""
+
+    model, time_field = SOURCES[kind]
+    cursor = (
+        model.get_motor_collection()
+        .find({"user_id": user_id, time_field: {"$lt": cutoff}}, batch_size=segment_size)
+        .sort([(time_field, ASCENDING), ("_id", ASCENDING)])
+    )
+
+    archived = 0
+    month: Optional[datetime] = None
+    batch: List[Dict[str, Any]] = []
+    async for doc in cursor:
+        doc_month = month_start(doc[time_field])
+        if batch and (doc_month != month or len(batch) >= segment_size):
+            archived += await _append_segment(user_id, kind, month, batch, codec)
+            batch = []
+        month = doc_month
+        batch.append(doc)
+    if batch:
+        archived += await _append_segment(user_id, kind, month, batch, codec)
+    return archived
+
+
+async def archive_old_documents(older_than_days: Optional[int] = None) -> Dict[str, int]:
+    """
+    Move every `Chat` and `Analytics` document from a calendar month that
+    ended more than `older_than_days` ago into compressed archive segments.
+
+    Only whole months are archived, so a month is normally written once.
+    Work proceeds user by user along the `user_id`-prefixed indexes, holding at
+    most one segment in memory, and is safe to re-run after a crash.
+
+    Returns:
+        The number of documents archived per kind.
+    """
+
+    settings = get_settings()
+    days = settings.archive_after_days if older_than_days is None else older_than_days
+    codec = settings.archive_codec
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("ARCHIVE_CODEC=zstd needs the 'zstandard' package")
+    cutoff = month_start(datetime.utcnow() - timedelta(days=days))
+
+    totals = {kind: 0 for kind in SOURCES}
+    user_ids: List[Optional[PydanticObjectId]] = [None]  # chats sent without logging in
+    async for user in User.get_motor_collection().find({}, projection={"_id": 1}):
+        user_ids.append(user["_id"])
+
+    for user_id in user_ids:
+        for kind in SOURCES:
+            try:
+                totals[kind] += await archive_user(
+                    user_id, kind, cutoff, codec=codec, segment_size=settings.archive_segment_size
+                )
+            except Exception:
+                logger.exception("Archiving %s for user %s failed", kind, user_id)
+    return totals
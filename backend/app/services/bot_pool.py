@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class NoHealthyEndpoint(RuntimeError):
+    """Raised when every endpoint's circuit breaker is open."""
+
+
+class PoolOverloaded(RuntimeError):
+    """Raised when the pool is already at its concurrency limit."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Opens after `failure_threshold` failures in a row. Once `reset_timeout`
+    seconds have passed it goes half-open and lets a single probe through; the
+    probe's outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._probing)
+
+    def on_dispatch(self) -> None:
+        if self.state == "half_open":
+            self._probing = True
+
+    def on_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def on_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def on_abandon(self) -> None:
+        """The dispatched call was cancelled (e.g. a losing hedge); it proves nothing either way."""
+
+        self._probing = False
+
+
+class Endpoint:
+    def __init__(self, url: str, breaker: CircuitBreaker) -> None:
+        self.url = url
+        self.breaker = breaker
+        self.outstanding = 0
+
+
+class EndpointPool:
+    """
+    Client-side load balancer over a set of equivalent endpoints.
+
+    * least-outstanding-requests selection among endpoints whose breaker is
+      not open, with random tie-breaking;
+    * bounded retries with exponential backoff and full jitter on errors the
+      caller marks retryable, preferring endpoints not yet tried;
+    * optional hedging: if an attempt is still running after the observed
+      `hedge_percentile` latency, a second one is sent to another endpoint and
+      the first success wins;
+    * a global concurrency limit that rejects immediately instead of queueing;
+    * an optional overall `deadline` per call covering every attempt, hedge
+      and backoff, after which the call fails with `TimeoutError`. No retry is
+      started once its backoff would run past the deadline.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        *,
+        retryable: Callable[[BaseException], bool],
+        max_retries: int = 2,
+        backoff: float = 0.1,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 50,
+        max_concurrency: int = 0,
+    ) -> None:
+        if not urls:
+            raise ValueError("EndpointPool needs at least one URL")
+        self.endpoints = [Endpoint(url, CircuitBreaker(failure_threshold, reset_timeout)) for url in urls]
+        self.retryable = retryable
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.shed = 0
+        self.hedged = 0
+        self.timed_out = 0
+        self._latencies: Deque[float] = deque(maxlen=1024)
+
+    def pick(self, avoid: Set[str] = frozenset()) -> Endpoint:
+        healthy = [ep for ep in self.endpoints if ep.breaker.available()]
+        if not healthy:
+            raise NoHealthyEndpoint("All AI bot endpoints are unavailable")
+        fresh = [ep for ep in healthy if ep.url not in avoid] or healthy
+        least = min(ep.outstanding for ep in fresh)
+        return random.choice([ep for ep in fresh if ep.outstanding == least])
+
+    def acquire(self, avoid: Set[str] = frozenset(), endpoint: Optional[Endpoint] = None) -> Endpoint:
+        endpoint = endpoint or self.pick(avoid)
+        endpoint.breaker.on_dispatch()
+        endpoint.outstanding += 1
+        return endpoint
+
+    def release(self, endpoint: Endpoint, error: Optional[BaseException], started: Optional[float] = None) -> None:
+        """Settle an `acquire`; pass `started` to feed the latency samples used for hedging."""
+
+        endpoint.outstanding -= 1
+        if isinstance(error, asyncio.CancelledError):
+            endpoint.breaker.on_abandon()
+        elif error is not None and self.retryable(error):
+            endpoint.breaker.on_failure()
+        else:
+            endpoint.breaker.on_success()
+            if error is None and started is not None:
+                self._latencies.append(time.monotonic() - started)
+
+    def enter(self) -> None:
+        if self.max_concurrency and self.active >= self.max_concurrency:
+            self.shed += 1
+            raise PoolOverloaded("AI bot concurrency limit reached")
+        self.active += 1
+
+    def exit(self) -> None:
+        self.active -= 1
+
+    async def call(self, send: Callable[[str], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        self.enter()
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline if deadline else None
+        try:
+            async with asyncio.timeout_at(expires_at):
+                tried: Set[str] = set()
+                attempt = 0
+                while True:
+                    try:
+                        return await self._hedged(send, tried)
+                    except BaseException as exc:
+                        if attempt >= self.max_retries or not self.retryable(exc):
+                            raise
+                        attempt += 1
+                        delay = random.uniform(0, self.backoff * (2 ** attempt))
+                        if expires_at is not None and loop.time() + delay >= expires_at:
+                            raise
+                    await asyncio.sleep(delay)
+        except TimeoutError:
+            self.timed_out += 1
+            raise
+        finally:
+            self.exit()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    async def _attempt(self, endpoint: Endpoint, send: Callable[[str], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        try:
+            return await send(endpoint.url)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            self.release(endpoint, error, started)
+
+    async def _hedged(self, send: Callable[[str], Awaitable[T]], tried: Set[str]) -> T:
+        first = self.acquire(tried)
+        tried.add(first.url)
+        delay = self._hedge_delay()
+        if delay is None or len(self.endpoints) < 2:
+            return await self._attempt(first, send)
+
+        tasks: List[asyncio.Task] = [asyncio.ensure_future(self._attempt(first, send))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                try:
+                    candidate: Optional[Endpoint] = self.pick(tried)
+                except NoHealthyEndpoint:
+                    candidate = None
+                # Hedge only onto a different endpoint; re-sending to the slow one would not help.
+                if candidate is not None and candidate.url not in tried:
+                    second = self.acquire(endpoint=candidate)
+                    tried.add(second.url)
+                    self.hedged += 1
+                    tasks.append(asyncio.ensure_future(self._attempt(second, send)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "active": self.active,
+            "shed": self.shed,
+            "hedged": self.hedged,
+            "timed_out": self.timed_out,
+            "open_breakers": sum(1 for ep in self.endpoints if ep.breaker.state == "open"),
+            "endpoints": [
+                {"url": ep.url, "state": ep.breaker.state, "outstanding": ep.outstanding}
+                for ep in self.endpoints
+            ],
+        }
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Literal
+
+from beanie import PydanticObjectId
+
+from app.services.chat_history import iter_user_chats
+
+ExportFormat = Literal["ndjson", "csv"]
+
+CHUNK_BYTES = 64 * 1024
+CSV_HEADER = ["id", "created_at", "message", "reply", "risk_score", "risk_flags"]
+# Leading characters that make Excel and Sheets evaluate a cell as a formula.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _row(doc: Dict[str, Any]) -> List[Any]:
+    return [
+        str(doc["_id"]),
+        doc["created_at"].isoformat() if doc.get("created_at") else "",
+        doc.get("message", ""),
+        doc.get("reply", ""),
+        doc.get("risk_score", 0.0),
+        doc.get("risk_flags", []),
+    ]
+
+
+def _ndjson_line(doc: Dict[str, Any]) -> str:
+    return json.dumps(dict(zip(CSV_HEADER, _row(doc))), ensure_ascii=False) + "\n"
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, list):
+        value = "|".join(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_line(values: List[Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([_csv_cell(v) for v in values])
+    return buffer.getvalue()
+
+
+async def _text_chunks(user_id: PydanticObjectId, fmt: ExportFormat, batch_size: int) -> AsyncIterator[bytes]:
+    parts: List[str] = [_csv_line(CSV_HEADER)] if fmt == "csv" else []
+    size = sum(len(p) for p in parts)
+    async for doc in iter_user_chats(user_id, batch_size=batch_size):
+        line = _ndjson_line(doc) if fmt == "ndjson" else _csv_line(_row(doc))
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+async def export_user_chats(
+    user_id: PydanticObjectId,
+    fmt: ExportFormat = "ndjson",
+    compress: bool = False,
+    batch_size: int = 500,
+) -> AsyncIterator[bytes]:
+    """
+    Stream a user's full chat history as NDJSON or CSV, optionally gzipped.
+
+    Output is produced in ~64 KiB chunks as the cursor advances; compression
+    runs in a worker thread so large exports do not stall the event loop.
+    CSV cells that a spreadsheet would read as a formula are prefixed with `'`.
+    """
+
+    if not compress:
+        async for chunk in _text_chunks(user_id, fmt, batch_size):
+            yield chunk
+        return
+
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in _text_chunks(user_id, fmt, batch_size):
+        compressed = await asyncio.to_thread(gzip.compress, chunk)
+        if compressed:
+            yield compressed
+    yield gzip.flush()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING
+
+from app.models.chat import Chat
+from app.services.archive import iter_archived
+
+
+class ChatHistoryView(BaseModel):
+    """Projection of `Chat` carrying only what the history endpoints return."""
+
+    id: PydanticObjectId = Field(alias="_id")
+    message: str
+    reply: str
+    created_at: datetime
+
+
+class InvalidCursor(ValueError):
+    """Raised when a history cursor cannot be decoded."""
+
+
+def encode_cursor(created_at: datetime, chat_id: PydanticObjectId) -> str:
+    raw = f"{created_at.isoformat()}|{chat_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, PydanticObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, chat_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), PydanticObjectId(chat_id)
+    except Exception as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _keyset(op: str, created_at: datetime, chat_id: PydanticObjectId) -> Dict[str, Any]:
+    return {
+        "$or": [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, "_id": {op: chat_id}},
+        ]
+    }
+
+
+async def _archived_page(
+    user_id: PydanticObjectId,
+    limit: int,
+    descending: bool,
+    bound: Optional[Tuple[datetime, PydanticObjectId]],
+) -> List[ChatHistoryView]:
+    """Up to `limit` archived chats past `bound`, walking in the requested direction."""
+
+    if limit <= 0:
+        return []
+    window: Dict[str, datetime] = {}
+    if bound is not None:
+        window["before" if descending else "after"] = bound[0]
+
+    page: List[ChatHistoryView] = []
+    async for doc in iter_archived(user_id, "chats", descending=descending, **window):
+        key = (doc["created_at"], doc["_id"])
+        if bound is not None and (key >= bound if descending else key <= bound):
+            continue
+        page.append(ChatHistoryView.model_validate(doc))
+        if len(page) >= limit:
+            break
+    return page
+
+
+async def fetch_history_page(
+    user_id: PydanticObjectId,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> List[ChatHistoryView]:
+    """
+    Return one page of a user's chats in chronological order.
+
+    Pages are keyset-paginated on `(created_at, _id)` and served by the
+    `(user_id, created_at, _id)` index. Without cursors the newest `limit`
+    chats are returned; `before` walks back in time and `after` forward.
+
+    Archived months are older than anything still in `chats`, so walking back
+    continues into the archive once the live collection runs out, and walking
+    forward from an archived cursor drains the archive before the live chats.
+
+    Raises:
+        InvalidCursor: If a cursor is malformed.
+    """
+
+    query: Dict[str, Any] = {"user_id": user_id}
+    bound: Optional[Tuple[datetime, PydanticObjectId]] = None
+    if before:
+        bound = decode_cursor(before)
+        query.update(_keyset("$lt", *bound))
+        direction = DESCENDING
+    elif after:
+        bound = decode_cursor(after)
+        query.update(_keyset("$gt", *bound))
+        direction = ASCENDING
+    else:
+        direction = DESCENDING
+
+    archived: List[ChatHistoryView] = []
+    if direction == ASCENDING:
+        archived = await _archived_page(user_id, limit, False, bound)
+        if len(archived) >= limit:
+            return archived
+
+    chats = (
+        await Chat.find(query)
+        .sort([("created_at", direction), ("_id", direction)])
+        .limit(limit - len(archived))
+        .project(ChatHistoryView)
+        .to_list()
+    )
+    if direction == ASCENDING:
+        return archived + chats
+
+    chats += await _archived_page(user_id, limit - len(chats), True, bound)
+    chats.reverse()
+    return chats
+
+
+EXPORT_FIELDS = ("_id", "created_at", "message", "reply", "risk_score", "risk_flags")
+
+
+async def iter_user_chats(user_id: PydanticObjectId, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield every chat of a user, oldest first, as raw documents.
+
+    Archived months come first, decompressed one month at a time; the live
+    collection is then read through a Motor cursor in `batch_size` batches
+    along the `(user_id, created_at, _id)` index, so memory stays flat
+    regardless of how much history the user has.
+    """
+
+    async for doc in iter_archived(user_id, "chats"):
+        yield {field: doc[field] for field in EXPORT_FIELDS if field in doc}
+
+    cursor = (
+        Chat.get_motor_collection()
+        .find({"user_id": user_id}, projection={field: 1 for field in EXPORT_FIELDS}, batch_size=batch_size)
+        .sort([("created_at", ASCENDING), ("_id", ASCENDING)])
+    )
+    async for doc in cursor:
+        yield doc
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+
+from app.dates import to_naive_utc
+from app.models.chat import Chat
+
+SNIPPET_RADIUS = 60
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def query_terms(query: str) -> List[str]:
+    """Lower-cased search words with quotes and `-negations` dropped, for highlighting."""
+
+    terms = []
+    for token in query.replace('"', " ").split():
+        if token.startswith("-"):
+            continue
+        terms.extend(word.lower() for word in _WORD_RE.findall(token))
+    return terms
+
+
+def _stem(term: str) -> str:
+    # Close enough to Mongo's stemming to highlight "exams" for "exam" and vice versa.
+    for suffix in ("ing", "es", "ed", "s"):
+        if len(term) > len(suffix) + 2 and term.endswith(suffix):
+            return term[: -len(suffix)]
+    return term
+
+
+def highlight(text: str, terms: List[str]) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Cut a snippet around the first matching word and return it with the
+    `(start, end)` offsets of every matching word inside the snippet.
+    """
+
+    stems = {_stem(term) for term in terms}
+    spans = [
+        (m.start(), m.end())
+        for m in _WORD_RE.finditer(text)
+        if any(m.group().lower().startswith(stem) for stem in stems)
+    ]
+    if not spans:
+        return text[: SNIPPET_RADIUS * 2], []
+
+    start = max(0, spans[0][0] - SNIPPET_RADIUS)
+    end = min(len(text), spans[0][1] + SNIPPET_RADIUS)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    offset = len(prefix) - start
+    inside = [(s + offset, e + offset) for s, e in spans if s >= start and e <= end]
+    return f"{prefix}{text[start:end]}{suffix}", inside
+
+
+async def search_chats(
+    user_id: PydanticObjectId,
+    query: str,
+    page: int = 1,
+    page_size: int = 20,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Rank a user's chats against `query` with the `user_text` index.
+
+    The `user_id` equality prefix scopes the index scan to one user; results
+    are ordered by text score, then recency. Archived chats are not searched.
+    """
+
+    criteria: Dict[str, Any] = {"user_id": user_id, "$text": {"$search": query}}
+    if since or until:
+        criteria["created_at"] = {
+            k: to_naive_utc(v) for k, v in (("$gte", since), ("$lte", until)) if v
+        }
+
+    cursor = (
+        Chat.get_motor_collection()
+        .find(
+            criteria,
+            projection={"message": 1, "reply": 1, "created_at": 1, "score": {"$meta": "textScore"}},
+        )
+        .sort([("score", {"$meta": "textScore"}), ("created_at", -1)])
+        .skip((page - 1) * page_size)
+        .limit(page_size)
+    )
+
+    terms = query_terms(query)
+    results = []
+    async for doc in cursor:
+        message, message_marks = highlight(doc.get("message", ""), terms)
+        reply, reply_marks = highlight(doc.get("reply", ""), terms)
+        results.append(
+            {
+                "id": str(doc["_id"]),
+                "created_at": doc["created_at"],
+                "score": doc["score"],
+                "message": message,
+                "message_highlights": message_marks,
+                "reply": reply,
+                "reply_highlights": reply_marks,
+            }
+        )
+    return results
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+
+from app.config import get_settings
+from app.metrics import register_stats
+from app.models.chat import Chat
+from app.services.chat_history import fetch_history_page
+from app.services.write_behind import pending_writes
+
+Turn = Tuple[str, str]
+
+
+class ConversationStore:
+    """
+    Per-user ring buffers of the most recent `(message, reply)` turns.
+
+    At most `max_users` conversations are kept; the least recently used one
+    is dropped first and reloaded from chat history on its next message.
+    A reload also picks up this worker's chats still queued for write-behind.
+
+    Buffers are per worker: a warm buffer does not see turns another worker
+    served for the same user until it is evicted and reloaded.
+    """
+
+    def __init__(self, max_turns: int, char_budget: int, max_users: int) -> None:
+        self.max_turns = max_turns
+        self.char_budget = char_budget
+        self.max_users = max_users
+        self._buffers: "OrderedDict[str, Deque[Turn]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _touch(self, key: str, buffer: Deque[Turn]) -> None:
+        self._buffers[key] = buffer
+        self._buffers.move_to_end(key)
+        while len(self._buffers) > self.max_users:
+            self._buffers.popitem(last=False)
+
+    async def get(self, user_id: PydanticObjectId) -> List[Dict[str, str]]:
+        """
+        Return the user's recent turns, oldest first, trimmed to the character budget.
+
+        A newest turn that alone exceeds the budget is cut down to it.
+        """
+
+        key = str(user_id)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            self.misses += 1
+            chats = await fetch_history_page(user_id, self.max_turns)
+            stored = {chat.id for chat in chats}
+            queued = [
+                chat for chat in pending_writes(Chat) if chat.user_id == user_id and chat.id not in stored
+            ]
+            merged = sorted([*chats, *queued], key=lambda chat: chat.created_at)
+            buffer = deque(((chat.message, chat.reply) for chat in merged), maxlen=self.max_turns)
+        else:
+            self.hits += 1
+        self._touch(key, buffer)
+
+        turns: List[Dict[str, str]] = []
+        used = 0
+        for message, reply in reversed(buffer):
+            used += len(message) + len(reply)
+            if used > self.char_budget:
+                if turns:
+                    break
+                message = message[: self.char_budget]
+                reply = reply[: self.char_budget - len(message)]
+            turns.append({"message": message, "reply": reply})
+        turns.reverse()
+        return turns
+
+    def append(self, user_id: PydanticObjectId, message: str, reply: str) -> None:
+        # Only extend conversations already in memory; a cold one is loaded
+        # from history, which includes this turn, on its next `get`.
+        buffer = self._buffers.get(str(user_id))
+        if buffer is not None:
+            buffer.append((message, reply))
+
+    def stats(self) -> Dict[str, int]:
+        return {"users": len(self._buffers), "hits": self.hits, "misses": self.misses}
+
+
+_settings = get_settings()
+_store = ConversationStore(
+    max_turns=_settings.context_max_turns,
+    char_budget=_settings.context_char_budget,
+    max_users=_settings.context_max_users,
+)
+
+
+async def get_conversation(user_id: Optional[PydanticObjectId]) -> List[Dict[str, str]]:
+    if user_id is None or _store.max_turns <= 0:
+        return []
+    return await _store.get(user_id)
+
+
+def record_turn(user_id: Optional[PydanticObjectId], message: str, reply: str) -> None:
+    if user_id is not None:
+        _store.append(user_id, message, reply)
+
+
+def conversation_stats() -> Dict[str, int]:
+    return _store.stats()
+
+
+register_stats("conversation", conversation_stats)
@@ -0,0 +1,470 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from beanie import PydanticObjectId
+from pymongo import ASCENDING, UpdateMany
+from pymongo.errors import DuplicateKeyError
+
+from app.config import get_settings
+from app.metrics import register_stats
+from app.models.guardian_alert import GuardianAlert, GuardianAlertWindow
+from app.models.user import User
+from app.services.risk import RiskAssessment
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GuardianNotification:
+    """One digest for one guardian, covering every alert collected for the user since the last one."""
+
+    user_id: PydanticObjectId
+    user_name: str
+    guardian_name: Optional[str]
+    guardian_email: Optional[str]
+    guardian_phone: Optional[str]
+    alert_count: int
+    max_risk: float
+    flags: List[str]
+    categories: Dict[str, float]
+    first_at: datetime
+    last_at: datetime
+    alert_ids: List[Any] = field(default_factory=list, repr=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("alert_ids")
+        data["user_id"] = str(self.user_id)
+        data["first_at"] = self.first_at.isoformat()
+        data["last_at"] = self.last_at.isoformat()
+        return data
+
+
+class AlertNotifier(ABC):
+    """
+    Delivery backend for guardian notifications (email, SMS, ...).
+
+    `send_batch` returns one entry per notification: `None` when it was
+    delivered, or the exception that prevented it. Raising fails the whole
+    batch. Both kinds of failure are retried with backoff.
+    """
+
+    @abstractmethod
+    async def send_batch(self, notifications: Sequence[GuardianNotification]) -> List[Optional[Exception]]:
+        ...
+
+
+class LogNotifier(AlertNotifier):
+    """Stand-in that only logs; the default until a real channel is configured."""
+
+    async def send_batch(self, notifications: Sequence[GuardianNotification]) -> List[Optional[Exception]]:
+        for notification in notifications:
+            logger.warning("Guardian alert: %s", json.dumps(notification.as_dict()))
+        return [None] * len(notifications)
+
+
+class FileNotifier(AlertNotifier):
+    """Stand-in that appends each notification to an NDJSON file, for tests and local runs."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def _write(self, lines: List[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.writelines(lines)
+
+    async def send_batch(self, notifications: Sequence[GuardianNotification]) -> List[Optional[Exception]]:
+        lines = [json.dumps(n.as_dict(), ensure_ascii=False) + "\n" for n in notifications]
+        await asyncio.to_thread(self._write, lines)
+        return [None] * len(notifications)
+
+
+_notifier: Optional[AlertNotifier] = None
+
+
+@lru_cache()
+def _default_notifier() -> AlertNotifier:
+    settings = get_settings()
+    if settings.alert_notifier == "file":
+        return FileNotifier(settings.alert_file_path)
+    return LogNotifier()
+
+
+def get_alert_notifier() -> AlertNotifier:
+    return _notifier or _default_notifier()
+
+
+def set_alert_notifier(notifier: Optional[AlertNotifier]) -> None:
+    """Install a custom delivery backend, or pass `None` to go back to the configured one."""
+
+    global _notifier
+    _notifier = notifier
+
+
+def _retry_delay(backoff: float, attempts: int) -> float:
+    delay = backoff * (2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class AlertPipeline:
+    """
+    Worker pool draining the `guardian_alerts` queue collection.
+
+    Each worker claims up to `batch_size` due alerts under a lease, so several
+    processes can share the queue and a crashed worker's claims become due
+    again once the lease lapses. Claimed alerts are grouped per user into one
+    digest; a user's guardian is notified at most once per `window` seconds
+    (tracked in `guardian_alert_windows`, shared by all workers), and alerts
+    arriving inside the window are held back and folded into the next digest.
+    Digests go to the notifier in one batch; failed ones are retried with
+    exponential backoff up to `max_attempts`. Alerts are claimed oldest first,
+    the lease is renewed just before delivery, and results are only recorded
+    while the claiming worker still holds the lease.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        window: float = 3600.0,
+        max_attempts: int = 5,
+        backoff: float = 30.0,
+        lease: float = 60.0,
+    ) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.window = timedelta(seconds=window)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = timedelta(seconds=lease)
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Set[asyncio.Future] = set()
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._work(), name=f"guardian-alerts-{n}") for n in range(self.workers)
+            ]
+
+    async def close(self) -> None:
+        """Stop the workers, letting batches that are mid-delivery finish."""
+
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                # Shield the batch so shutdown cannot cut a delivery off before it is recorded.
+                batch = asyncio.ensure_future(self.run_once())
+                self._inflight.add(batch)
+                batch.add_done_callback(self._inflight.discard)
+                claimed = await asyncio.shield(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Guardian alert batch failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self) -> int:
+        """Claim and process one batch; returns how many alerts were claimed."""
+
+        alerts = await self._claim()
+        if alerts:
+            await self._process(alerts)
+        return len(alerts)
+
+    async def _claim(self) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        collection = GuardianAlert.get_motor_collection()
+        due = {
+            "$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "processing", "lease_until": {"$lt": now}},
+            ]
+        }
+        # Oldest first, so a backlog cannot starve alerts that have waited longest.
+        candidates = collection.find(due, projection={"_id": 1}).sort("next_attempt_at", ASCENDING)
+        ids = [doc["_id"] async for doc in candidates.limit(self.batch_size)]
+        if not ids:
+            return []
+        # Only alerts still due when the update lands are ours; another worker may have taken the rest.
+        await collection.update_many(
+            {"_id": {"$in": ids}, **due},
+            {"$set": {"status": "processing", "lease": token, "lease_until": now + self.lease}},
+        )
+        alerts = await collection.find({"lease": token}).to_list(length=None)
+        self.counts["claimed"] += len(alerts)
+        return alerts
+
+    async def _renew(self, token: str, ids: List[Any]) -> Set[Any]:
+        """Extend this worker's lease on `ids`; returns those still held (not lapsed or taken over)."""
+
+        now = datetime.utcnow()
+        collection = GuardianAlert.get_motor_collection()
+        held = {"_id": {"$in": ids}, "lease": token, "lease_until": {"$gt": now}}
+        await collection.update_many(held, {"$set": {"lease_until": now + self.lease}})
+        return {doc["_id"] async for doc in collection.find(held, projection={"_id": 1})}
+
+    async def _reserve(self, user_id: PydanticObjectId, now: datetime) -> Optional[datetime]:
+        """Open the user's rate-limit window; returns when it reopens if it is still closed."""
+
+        collection = GuardianAlertWindow.get_motor_collection()
+        try:
+            await collection.find_one_and_update(
+                {"user_id": user_id, "next_allowed_at": {"$lte": now}},
+                {"$set": {"next_allowed_at": now + self.window}},
+                upsert=True,
+            )
+            return None
+        except DuplicateKeyError:
+            window = await collection.find_one({"user_id": user_id}, projection={"next_allowed_at": 1})
+            return window["next_allowed_at"] if window else now
+
+    async def _process(self, alerts: List[Dict[str, Any]]) -> None:
+        now = datetime.utcnow()
+        by_user: Dict[PydanticObjectId, List[Dict[str, Any]]] = defaultdict(list)
+        for alert in alerts:
+            by_user[alert["user_id"]].append(alert)
+
+        users = {
+            user["_id"]: user
+            async for user in User.get_motor_collection().find(
+                {"_id": {"$in": list(by_user)}}, projection={"name": 1, "parent": 1}
+            )
+        }
+
+        ops: List[UpdateMany] = []
+        deliverable: List[PydanticObjectId] = []
+        for user_id, group in by_user.items():
+            parent = (users.get(user_id) or {}).get("parent") or {}
+            if not (parent.get("email") or parent.get("phone")):
+                ops.append(self._settle(group, {"status": "undeliverable"}))
+                self.counts["undeliverable"] += len(group)
+            else:
+                deliverable.append(user_id)
+
+        if deliverable:
+            # Renew before delivery so a slow notifier gets a full lease; skip alerts another worker took over.
+            held = await self._renew(
+                alerts[0]["lease"], [alert["_id"] for user_id in deliverable for alert in by_user[user_id]]
+            )
+            for user_id in deliverable:
+                by_user[user_id] = [alert for alert in by_user[user_id] if alert["_id"] in held]
+            deliverable = [user_id for user_id in deliverable if by_user[user_id]]
+
+        reopens = await asyncio.gather(*(self._reserve(user_id, now) for user_id in deliverable))
+        notifications: List[GuardianNotification] = []
+        for user_id, reopens_at in zip(deliverable, reopens):
+            group = by_user[user_id]
+            if reopens_at is not None:
+                ops.append(self._settle(group, {"status": "pending", "next_attempt_at": reopens_at}))
+                self.counts["deferred"] += len(group)
+                continue
+            user = users[user_id]
+            parent = user.get("parent") or {}
+            categories: Dict[str, float] = {}
+            flags: Dict[str, None] = {}
+            for alert in group:
+                flags.update(dict.fromkeys(alert.get("flags") or []))
+                for category, weight in (alert.get("categories") or {}).items():
+                    categories[category] = max(categories.get(category, 0.0), weight)
+            notifications.append(
+                GuardianNotification(
+                    user_id=user_id,
+                    user_name=user.get("name", ""),
+                    guardian_name=parent.get("name"),
+                    guardian_email=parent.get("email"),
+                    guardian_phone=parent.get("phone"),
+                    alert_count=len(group),
+                    max_risk=max(alert["risk_score"] for alert in group),
+                    flags=list(flags),
+                    categories=categories,
+                    first_at=min(alert["created_at"] for alert in group),
+                    last_at=max(alert["created_at"] for alert in group),
+                    alert_ids=[alert["_id"] for alert in group],
+                )
+            )
+
+        if notifications:
+            ops.extend(await self._deliver(notifications, by_user, now))
+        if ops:
+            await GuardianAlert.get_motor_collection().bulk_write(ops, ordered=False)
+
+    async def _deliver(
+        self,
+        notifications: List[GuardianNotification],
+        by_user: Dict[PydanticObjectId, List[Dict[str, Any]]],
+        now: datetime,
+    ) -> List[UpdateMany]:
+        try:
+            results: List[Optional[BaseException]] = list(
+                await get_alert_notifier().send_batch(notifications)
+            )
+        except Exception as exc:
+            results = [exc] * len(notifications)
+        self.counts["batches"] += 1
+
+        ops: List[UpdateMany] = []
+        failed: List[PydanticObjectId] = []
+        for notification, error in zip(notifications, results):
+            group = by_user[notification.user_id]
+            if error is None:
+                ops.append(self._settle(group, {"status": "sent", "sent_at": now}))
+                self.counts["notifications"] += 1
+                self.counts["sent"] += len(group)
+                continue
+
+            failed.append(notification.user_id)
+            attempts = max(alert.get("attempts", 0) for alert in group) + 1
+            update: Dict[str, Any] = {"attempts": attempts, "last_error": repr(error)[:500]}
+            if attempts >= self.max_attempts:
+                update["status"] = "failed"
+                self.counts["failed"] += len(group)
+                logger.error("Giving up on guardian alert for user %s: %r", notification.user_id, error)
+            else:
+                update["status"] = "pending"
+                update["next_attempt_at"] = now + timedelta(seconds=_retry_delay(self.backoff, attempts))
+                self.counts["retried"] += len(group)
+            ops.append(self._settle(group, update))
+
+        if failed:
+            # Nothing reached these guardians, so do not hold the retry back by the rate limit.
+            await GuardianAlertWindow.get_motor_collection().update_many(
+                {"user_id": {"$in": failed}}, {"$set": {"next_allowed_at": now}}
+            )
+        return ops
+
+    @staticmethod
+    def _settle(group: List[Dict[str, Any]], update: Dict[str, Any]) -> UpdateMany:
+        # Only while this worker still holds the lease; a worker that took the alerts over owns their state.
+        return UpdateMany(
+            {"_id": {"$in": [alert["_id"] for alert in group]}, "lease": group[0]["lease"]},
+            {"$set": {**update, "lease": None, "lease_until": None}},
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+_pipeline: Optional[AlertPipeline] = None
+
+
+async def init_alerts() -> None:
+    """
+    Start the guardian alert workers if `ALERTS_ENABLED` is set.
+
+    Should be invoked on application startup after `init_db`.
+    """
+
+    global _pipeline
+    settings = get_settings()
+    if _pipeline is not None or not settings.alerts_enabled:
+        return
+
+    _pipeline = AlertPipeline(
+        workers=settings.alert_workers,
+        batch_size=settings.alert_batch_size,
+        poll_interval=settings.alert_poll_interval,
+        window=settings.alert_window,
+        max_attempts=settings.alert_max_attempts,
+        backoff=settings.alert_retry_backoff,
+        lease=settings.alert_lease,
+    )
+    _pipeline.start()
+
+
+async def close_alerts() -> None:
+    """Finish queued alert inserts and stop the alert workers; call on shutdown."""
+
+    global _pipeline
+    if _inserts:
+        await asyncio.gather(*_inserts, return_exceptions=True)
+    if _pipeline is None:
+        return
+
+    pipeline, _pipeline = _pipeline, None
+    await pipeline.close()
+
+
+_inserts: Set[asyncio.Task] = set()
+_insert_counts: Dict[str, int] = defaultdict(int)
+
+
+async def _insert_alert(alert: GuardianAlert) -> None:
+    settings = get_settings()
+    for attempt in range(1, settings.alert_insert_attempts + 1):
+        try:
+            await alert.insert()
+            _insert_counts["enqueued"] += 1
+            return
+        except DuplicateKeyError:
+            # The id is fixed up front, so an earlier attempt already landed.
+            _insert_counts["enqueued"] += 1
+            return
+        except Exception:
+            if attempt == settings.alert_insert_attempts:
+                _insert_counts["lost"] += 1
+                logger.exception("Could not queue guardian alert: %s", alert.model_dump_json())
+                return
+            _insert_counts["insert_retries"] += 1
+            await asyncio.sleep(_retry_delay(settings.alert_insert_backoff, attempt))
+
+
+async def enqueue_alert(user_id: Optional[PydanticObjectId], risk: RiskAssessment) -> None:
+    """
+    Queue a guardian alert for a message at or above `ALERT_RISK_THRESHOLD`.
+
+    The insert runs as a tracked background task, so the chat request neither
+    waits on it nor fails with it. Failed inserts are retried up to
+    `ALERT_INSERT_ATTEMPTS` times, and `close_alerts` waits for pending ones.
+    Delivery happens later in the worker pool.
+    """
+
+    settings = get_settings()
+    if not settings.alerts_enabled or user_id is None or risk.score < settings.alert_risk_threshold:
+        return
+    now = datetime.utcnow()
+    alert = GuardianAlert(
+        id=PydanticObjectId(),
+        user_id=user_id,
+        risk_score=risk.score,
+        flags=risk.flags,
+        categories=risk.categories,
+        created_at=now,
+        next_attempt_at=now,
+        expires_at=now + timedelta(days=settings.alert_retention_days),
+    )
+    task = asyncio.create_task(_insert_alert(alert))
+    _inserts.add(task)
+    task.add_done_callback(_inserts.discard)
+
+
+def alert_stats() -> Dict[str, int]:
+    stats = _pipeline.stats() if _pipeline else {}
+    stats.update(_insert_counts, pending_inserts=len(_inserts))
+    return stats
+
+
+register_stats("guardian_alerts", alert_stats)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from beanie import PydanticObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.config import get_settings
+from app.models.idempotency import IdempotencyRecord
+
+Handler = Callable[[], Awaitable[Dict[str, Any]]]
+
+_inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+
+
+class IdempotencyKeyReused(ValueError):
+    """The key was already used for a request with a different body."""
+
+
+class IdempotencyInProgress(RuntimeError):
+    """Another worker is still processing the key and did not finish within the wait budget."""
+
+
+def fingerprint(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def run_idempotent(
+    user_id: PydanticObjectId,
+    key: str,
+    request_fingerprint: str,
+    handler: Handler,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Run `handler` at most once per `(user_id, key)` within the retention window.
+
+    Duplicates on this worker await the first call directly. Across workers a
+    pending record with a unique index claims the key: duplicates poll it
+    until the owner stores the response. The claim is a lease of
+    `IDEMPOTENCY_LEASE` seconds; if the owner died without finishing, the
+    first retry after the lease lapses takes the key over and runs `handler`
+    itself. Successful responses are kept until `IDEMPOTENCY_TTL` expires
+    them. Failed attempts release the key so the client can retry.
+
+    Returns:
+        The response body and whether it was replayed rather than produced now.
+
+    Raises:
+        IdempotencyKeyReused: If the key was used with a different request.
+        IdempotencyInProgress: If another worker holds the key for too long.
+    """
+
+    scoped = f"{user_id}:{key}"
+    inflight = _inflight.get(scoped)
+    if inflight is not None:
+        inflight_fingerprint, task = inflight
+        if inflight_fingerprint != request_fingerprint:
+            raise IdempotencyKeyReused(scoped)
+        return await asyncio.shield(task), True
+
+    settings = get_settings()
+    now = datetime.utcnow()
+    record = IdempotencyRecord(
+        key=scoped,
+        user_id=user_id,
+        fingerprint=request_fingerprint,
+        lease_token=uuid.uuid4().hex,
+        lease_until=now + timedelta(seconds=settings.idempotency_lease),
+        expires_at=now + timedelta(seconds=settings.idempotency_ttl),
+    )
+    try:
+        await record.insert()
+    except DuplicateKeyError:
+        response, claimed = await _await_existing(scoped, request_fingerprint, settings.idempotency_wait_timeout)
+        if claimed is None:
+            return response, True
+        record = claimed
+
+    task = asyncio.ensure_future(_execute(record, handler))
+    _inflight[scoped] = (request_fingerprint, task)
+    task.add_done_callback(lambda _: _inflight.pop(scoped, None))
+    return await asyncio.shield(task), False
+
+
+async def _execute(record: IdempotencyRecord, handler: Handler) -> Dict[str, Any]:
+    # Release or complete the key only while this attempt still holds it; after a takeover it is the new owner's.
+    owned = {"_id": record.id, "lease_token": record.lease_token}
+    collection = IdempotencyRecord.get_motor_collection()
+    try:
+        response = await handler()
+    except BaseException:
+        await collection.delete_one(owned)
+        raise
+    await collection.update_one(owned, {"$set": {"state": "done", "response": response}})
+    return response
+
+
+def _lease_expired(record: IdempotencyRecord, now: datetime) -> bool:
+    lease_until = record.lease_until
+    if lease_until is None:
+        # Claimed before leases existed.
+        lease_until = record.created_at + timedelta(seconds=get_settings().idempotency_lease)
+    return lease_until <= now
+
+
+async def _take_over(record: IdempotencyRecord) -> Optional[IdempotencyRecord]:
+    """Claim a lapsed lease for this worker; `None` if another worker claimed it first."""
+
+    lease_token = uuid.uuid4().hex
+    lease_until = datetime.utcnow() + timedelta(seconds=get_settings().idempotency_lease)
+    result = await IdempotencyRecord.get_motor_collection().update_one(
+        {"_id": record.id, "state": "pending", "lease_until": record.lease_until},
+        {"$set": {"lease_token": lease_token, "lease_until": lease_until}},
+    )
+    if result.modified_count != 1:
+        return None
+    record.lease_token = lease_token
+    record.lease_until = lease_until
+    return record
+
+
+async def _await_existing(
+    scoped: str, request_fingerprint: str, timeout: float
+) -> Tuple[Optional[Dict[str, Any]], Optional[IdempotencyRecord]]:
+    """
+    Wait for the worker holding `scoped` to store its response.
+
+    Returns:
+        `(response, None)` once it is stored, or `(None, record)` when the
+        holder's lease lapsed and this worker took the claim over.
+    """
+
+    deadline = asyncio.get_running_loop().time() + timeout
+    delay = 0.05
+    while True:
+        existing = await IdempotencyRecord.find_one(IdempotencyRecord.key == scoped)
+        if existing is None:
+            # The owner failed and released the key; let the client retry it.
+            raise IdempotencyInProgress(scoped)
+        if existing.fingerprint != request_fingerprint:
+            raise IdempotencyKeyReused(scoped)
+        if existing.state == "done" and existing.response is not None:
+            return existing.response, None
+        if _lease_expired(existing, datetime.utcnow()):
+            claimed = await _take_over(existing)
+            if claimed is not None:
+                return None, claimed
+            continue
+        if asyncio.get_running_loop().time() + delay > deadline:
+            raise IdempotencyInProgress(scoped)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 1.0)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from app.config import get_settings
+
+
+DEFAULT_RATE_LIMITS: Dict[str, str] = {
+    "auth.login": "10/60",
+    "auth.signup": "5/300",
+    "chat.send.user": "30/60",
+    "chat.send.ip": "120/60",
+}
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float  # tokens added per second
+    burst: int  # bucket capacity
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit":
+        """Parse `"<requests>/<seconds>"`, e.g. `"30/60"`: bursts of 30, refilled at 0.5/s."""
+
+        count, _, seconds = spec.partition("/")
+        burst = int(count)
+        return cls(rate=burst / float(seconds or 1), burst=burst)
+
+
+class RateLimitBackend:
+    """
+    Token-bucket storage. Implement `take` against a shared store (e.g. a
+    Redis script) to enforce limits across workers.
+    """
+
+    async def take(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        """Consume one token; return `(allowed, seconds until a token is available)`."""
+
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process token buckets, stored as `[tokens, updated_at]` pairs in an
+    LRU-ordered dict capped at `max_keys`. An evicted bucket comes back full,
+    which only errs towards allowing traffic.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list[float]]" = OrderedDict()
+
+    async def take(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(limit.burst), now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(limit.burst), bucket[0] + (now - bucket[1]) * limit.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return True, 0.0
+        return False, (1.0 - bucket[0]) / limit.rate
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    global _backend
+    if _backend is None:
+        _backend = InMemoryRateLimitBackend(get_settings().rate_limit_max_keys)
+    return _backend
+
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+@lru_cache()
+def configured_limits() -> Dict[str, Limit]:
+    """
+    `DEFAULT_RATE_LIMITS` with the `RATE_LIMITS` overrides merged on top; an
+    override of `"off"` (or an empty string) disables that one limit.
+    """
+
+    settings = get_settings()
+    if not settings.rate_limit_enabled:
+        return {}
+    specs = {**DEFAULT_RATE_LIMITS, **settings.rate_limits}
+    return {name: Limit.parse(spec) for name, spec in specs.items() if spec and spec.lower() != "off"}
+
+
+async def take_token(name: str, key: str) -> Optional[float]:
+    """
+    Consume one token from the `name` bucket for `key`.
+
+    Returns:
+        `None` if allowed (or the limit is not configured), else the seconds
+        until a token is available.
+    """
+
+    limit = configured_limits().get(name)
+    if limit is None:
+        return None
+    allowed, retry_after = await get_rate_limit_backend().take(f"{name}|{key}", limit)
+    return None if allowed else retry_after
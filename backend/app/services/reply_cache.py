@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import get_settings
+from app.metrics import register_stats
+from app.services.ai_bot import fetch_ai_reply
+from app.services.cache import TTLCache
+from app.services.risk import normalize_text
+
+# Context keys that identify the caller rather than change the answer.
+_UNKEYED_CONTEXT = frozenset({"user_id"})
+
+
+def reply_cache_key(message: str, context: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Key a reply on the normalized message plus everything else forwarded to
+    the bot, including the whole conversation history window.
+
+    A reply can quote any turn it was generated from, so it may only be
+    served to a caller who forwarded exactly the same turns. In practice
+    replies are shared across users only for messages without history; a
+    user's own retries still hit.
+    """
+
+    context = context or {}
+    relevant = {k: v for k, v in context.items() if k not in _UNKEYED_CONTEXT}
+    raw = json.dumps([normalize_text(message), relevant], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReplyCache:
+    """
+    TTL+LRU cache of bot replies with single-flight request coalescing.
+
+    Concurrent lookups for the same key share one upstream call. That call runs
+    as its own task, so a caller disconnecting does not cancel it for the
+    others. Failures are not cached.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache: TTLCache[str, str] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+        self.bypassed = 0
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._settle(key, done))
+        return await asyncio.shield(task)
+
+    def _settle(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._cache.set(key, task.result())
+
+    def stats(self) -> Dict[str, float]:
+        stats = self._cache.stats()
+        stats.update(coalesced=self.coalesced, bypassed=self.bypassed, inflight=len(self._inflight))
+        return stats
+
+
+_settings = get_settings()
+_reply_cache = ReplyCache(maxsize=_settings.reply_cache_size, ttl=_settings.reply_cache_ttl)
+
+
+async def fetch_ai_reply_cached(message: str, context: Optional[Dict[str, Any]] = None) -> str:
+    """
+    `fetch_ai_reply` behind the shared reply cache.
+
+    The cache is skipped entirely when `REPLY_CACHE_ENABLED` is off or the
+    message carries risk flags; flagged conversations always get a fresh reply.
+    """
+
+    if not get_settings().reply_cache_enabled:
+        return await fetch_ai_reply(message, context=context)
+    if context and context.get("risk_flags"):
+        _reply_cache.bypassed += 1
+        return await fetch_ai_reply(message, context=context)
+
+    return await _reply_cache.get_or_fetch(
+        reply_cache_key(message, context),
+        lambda: fetch_ai_reply(message, context=context),
+    )
+
+
+def reply_cache_stats() -> Dict[str, float]:
+    return _reply_cache.stats()
+
+
+register_stats("reply_cache", reply_cache_stats)
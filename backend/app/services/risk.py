@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import json
+import unicodedata
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+
+
+@dataclass(frozen=True)
+class RiskTerm:
+    term: str
+    weight: float
+    category: str = "self_harm"
+
+
+@dataclass
+class RiskAssessment:
+    flags: List[str] = field(default_factory=list)
+    score: float = 0.0
+    categories: Dict[str, float] = field(default_factory=dict)
+
+
+DEFAULT_LEXICON: Tuple[RiskTerm, ...] = (
+    RiskTerm("suicide", 0.9),
+    RiskTerm("suicidal", 0.9),
+    RiskTerm("kill myself", 0.95),
+    RiskTerm("end my life", 0.95),
+    RiskTerm("end it", 0.5),
+    RiskTerm("end it all", 0.85),
+    RiskTerm("want to die", 0.9),
+    RiskTerm("harm", 0.4),
+    RiskTerm("self harm", 0.85),
+    RiskTerm("hurt myself", 0.8),
+    RiskTerm("cut myself", 0.85),
+    RiskTerm("hopeless", 0.5, "distress"),
+    RiskTerm("worthless", 0.4, "distress"),
+    RiskTerm("no reason to live", 0.9),
+    # Hinglish
+    RiskTerm("khudkushi", 0.9),
+    RiskTerm("aatmahatya", 0.9),
+    RiskTerm("atmahatya", 0.9),
+    RiskTerm("mar jaunga", 0.85),
+    RiskTerm("mar jaungi", 0.85),
+    RiskTerm("marna chahta", 0.9),
+    RiskTerm("marna chahti", 0.9),
+    RiskTerm("jeena nahi chahta", 0.85),
+    RiskTerm("jeena nahi chahti", 0.85),
+    RiskTerm("zindagi khatam", 0.85),
+    RiskTerm("koi umeed nahi", 0.5, "distress"),
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Fold text into the form the lexicon is matched against.
+
+    NFKC + casefold, Latin accents stripped, and every run of characters that
+    are neither alphanumeric nor marks collapsed to a single space, so
+    "Self-Harm!!" and "self  harm" both become "self harm" and word
+    boundaries are simply spaces. Marks that are not accents (e.g. Devanagari
+    vowel signs) stay part of the word.
+    """
+
+    decomposed = unicodedata.normalize("NFKD", unicodedata.normalize("NFKC", text).casefold())
+    out: List[str] = []
+    pending_space = False
+    for ch in decomposed:
+        if unicodedata.combining(ch) and out and out[-1].isascii():
+            # Accent on a Latin letter: "café" matches "cafe".
+            continue
+        if ch.isalnum() or unicodedata.category(ch).startswith("M"):
+            if pending_space and out:
+                out.append(" ")
+            pending_space = False
+            out.append(ch)
+        else:
+            pending_space = True
+    return "".join(out)
+
+
+class AhoCorasick:
+    """Multi-pattern matcher; construction is O(total pattern length), search is O(len(text) + matches)."""
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self.patterns = list(patterns)
+
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(index)
+
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[int, int]]:
+        """Yield `(end_index, pattern_index)` for every occurrence; `end_index` is exclusive."""
+
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for position, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for index in out[node]:
+                yield position + 1, index
+
+
+class RiskDetector(ABC):
+    """Interface for risk engines; `assess` must be cheap enough to run inline on every message."""
+
+    @abstractmethod
+    def assess(self, text: str) -> RiskAssessment:
+        ...
+
+
+class LexiconRiskDetector(RiskDetector):
+    """
+    Whole-word/phrase lexicon matcher backed by a single Aho-Corasick automaton.
+
+    Matches must start and end on a word boundary, so "harm" does not fire
+    inside "pharmacy". The score combines matched term weights as a noisy-or
+    (1 - prod(1 - w)) and never drops below `base_score`. Overlapping matches
+    are resolved leftmost-longest, so "self harm" is not also scored as
+    "harm", nor "end it all" as "end it".
+    """
+
+    def __init__(self, lexicon: Iterable[RiskTerm], base_score: float = 0.1) -> None:
+        self.base_score = base_score
+        self._terms: List[RiskTerm] = []
+        patterns: List[str] = []
+        seen: Dict[str, int] = {}
+        for entry in lexicon:
+            normalized = normalize_text(entry.term)
+            if not normalized:
+                continue
+            if normalized in seen:
+                self._terms[seen[normalized]] = entry
+                continue
+            seen[normalized] = len(patterns)
+            patterns.append(normalized)
+            self._terms.append(entry)
+        self._automaton = AhoCorasick(patterns)
+
+    def assess(self, text: str) -> RiskAssessment:
+        normalized = normalize_text(text)
+        length = len(normalized)
+        patterns = self._automaton.patterns
+        spans: List[Tuple[int, int, int]] = []
+        for end, index in self._automaton.iter_matches(normalized):
+            start = end - len(patterns[index])
+            if (start == 0 or normalized[start - 1] == " ") and (end == length or normalized[end] == " "):
+                spans.append((start, end, index))
+
+        # Leftmost-longest in one sweep: a span starting before the last kept one ends is part of it.
+        spans.sort(key=lambda span: (span[0], span[0] - span[1]))
+        kept_end = 0
+        hit: Dict[int, None] = {}
+        for start, end, index in spans:
+            if start < kept_end:
+                continue
+            kept_end = end
+            hit.setdefault(index)
+
+        if not hit:
+            return RiskAssessment(score=self.base_score)
+
+        keep = 1.0
+        categories: Dict[str, float] = {}
+        flags: List[str] = []
+        for index in hit:
+            term = self._terms[index]
+            flags.append(term.term)
+            keep *= 1.0 - term.weight
+            categories[term.category] = max(categories.get(term.category, 0.0), term.weight)
+        score = max(self.base_score, round(1.0 - keep, 4))
+        return RiskAssessment(flags=flags, score=score, categories=categories)
+
+
+def load_lexicon(path: Optional[str]) -> List[RiskTerm]:
+    """
+    Load a lexicon from a JSON file of `{"term", "weight", "category"?}` objects,
+    or return the built-in lexicon when no path is configured.
+    """
+
+    if not path:
+        return list(DEFAULT_LEXICON)
+    with open(path, encoding="utf-8") as fh:
+        entries = json.load(fh)
+    return [RiskTerm(e["term"], float(e["weight"]), e.get("category", "self_harm")) for e in entries]
+
+
+_detector: Optional[RiskDetector] = None
+
+
+@lru_cache()
+def _default_detector() -> RiskDetector:
+    settings = get_settings()
+    return LexiconRiskDetector(load_lexicon(settings.risk_lexicon_path), base_score=settings.risk_base_score)
+
+
+def get_risk_detector() -> RiskDetector:
+    return _detector or _default_detector()
+
+
+def set_risk_detector(detector: Optional[RiskDetector]) -> None:
+    """Install a custom engine, or pass `None` to go back to the configured lexicon."""
+
+    global _detector
+    _detector = detector
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from beanie import PydanticObjectId
+
+from app.config import get_settings
+from app.metrics import register_stats
+from app.models.user import User
+from app.services.cache import TTLCache
+
+InvalidationListener = Callable[[str], Awaitable[None]]
+
+_settings = get_settings()
+_cache: TTLCache[str, User] = TTLCache(maxsize=_settings.user_cache_size, ttl=_settings.user_cache_ttl)
+_listeners: List[InvalidationListener] = []
+
+
+async def get_cached_user(user_id: str) -> Optional[User]:
+    """
+    Return the `User` for `user_id`, loading it from Mongo on a cache miss.
+
+    The returned document is shared between requests until it expires or is
+    invalidated, so callers that modify it must call `invalidate_user` after
+    saving.
+    """
+
+    user = _cache.get(user_id)
+    if user is not None:
+        return user
+
+    user = await User.get(PydanticObjectId(user_id))
+    if user is not None:
+        _cache.set(user_id, user)
+    return user
+
+
+async def invalidate_user(user_id: str | PydanticObjectId | None) -> None:
+    """
+    Drop a user from this worker's cache and notify registered listeners.
+
+    Listeners are how other workers hear about the change, e.g. a publisher on
+    a shared pub/sub channel whose subscribers call `evict_local`.
+    """
+
+    if user_id is None:
+        return
+    key = str(user_id)
+    evict_local(key)
+    for listener in _listeners:
+        await listener(key)
+
+
+def evict_local(user_id: str) -> None:
+    """Drop a user from this worker's cache only, without notifying listeners."""
+
+    _cache.pop(user_id)
+
+
+def add_invalidation_listener(listener: InvalidationListener) -> None:
+    _listeners.append(listener)
+
+
+def user_cache_stats() -> Dict[str, float]:
+    return _cache.stats()
+
+
+register_stats("user_cache", user_cache_stats)
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Type, TypeVar
+
+from beanie import Document, PydanticObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.config import get_settings
+from app.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+D = TypeVar("D", bound=Document)
+
+
+class WriteBehindQueue:
+    """
+    Buffer document inserts and flush them with `insert_many`.
+
+    Documents are flushed when `batch_size` are pending or `flush_interval`
+    seconds after the first one arrived, whichever comes first. The queue holds
+    at most `max_pending` documents; when it is full, `submit` waits up to
+    `enqueue_timeout` seconds and then writes the document synchronously, so
+    saturation degrades to the old behaviour instead of growing memory.
+
+    A failed batch insert is retried up to `max_retries` times with
+    exponential backoff, then each remaining document is inserted on its own.
+    Ids are assigned before the first attempt, so a retry that repeats an
+    insert which actually landed hits a duplicate key and counts as done.
+    Documents that still fail are logged in full as dead letters and counted
+    as `dropped`.
+
+    Reads that go straight to Mongo miss documents until their batch lands,
+    usually within `flush_interval`; `pending` lists the ones this worker has
+    not written yet so readers that need them can merge them in.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        max_pending: int = 10_000,
+        enqueue_timeout: float = 0.01,
+        max_retries: int = 3,
+        retry_backoff: float = 0.1,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: asyncio.Queue[Document] = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[Document] = []
+        self._inflight: Optional[asyncio.Future] = None
+        self._unwritten: Dict[int, Document] = {}
+        self.flushed = 0
+        self.sync_fallbacks = 0
+        self.retries = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="write-behind")
+
+    async def submit(self, document: Document) -> None:
+        if self._task is None:
+            await document.insert()
+            return
+        # Tracked before it is queued: the flusher may take it before `put` returns.
+        self._unwritten[id(document)] = document
+        try:
+            self._queue.put_nowait(document)
+            return
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self._queue.put(document), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            del self._unwritten[id(document)]
+            self.sync_fallbacks += 1
+            await document.insert()
+
+    def pending(self, model: Type[D]) -> List[D]:
+        """Documents of `model` submitted to this queue and not yet written, oldest first."""
+
+        return [document for document in self._unwritten.values() if type(document) is model]
+
+    async def drain(self) -> None:
+        """Stop the flusher after writing everything already queued."""
+
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        if self._inflight is not None and not self._inflight.done():
+            await self._inflight
+        pending, self._batch = self._batch, []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            await self._flush(pending)
+
+    async def _run(self) -> None:
+        while True:
+            self._batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._batch = self._batch, []
+            # Shield the flush so shutdown cannot drop a batch that already left the queue.
+            self._inflight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._inflight)
+
+    async def _flush(self, batch: List[Document]) -> None:
+        groups: Dict[Type[Document], List[Document]] = defaultdict(list)
+        for document in batch:
+            if document.id is None:
+                document.id = PydanticObjectId()
+            groups[type(document)].append(document)
+        for model, documents in groups.items():
+            try:
+                await self._insert(model, documents)
+            finally:
+                for document in documents:
+                    self._unwritten.pop(id(document), None)
+
+    async def _insert(self, model: Type[Document], documents: List[Document]) -> None:
+        remaining = documents
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+                await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+            try:
+                await model.insert_many(remaining, ordered=False)
+                self.flushed += len(remaining)
+                return
+            except BulkWriteError as exc:
+                # Unordered: everything went in except the reported errors; duplicates are earlier attempts.
+                failed = {
+                    error["index"] for error in exc.details.get("writeErrors", []) if error.get("code") != 11000
+                }
+                self.flushed += len(remaining) - len(failed)
+                remaining = [doc for index, doc in enumerate(remaining) if index in failed]
+                if not remaining:
+                    return
+            except Exception:
+                logger.warning(
+                    "Batched insert of %d %s documents failed (attempt %d)",
+                    len(remaining),
+                    model.__name__,
+                    attempt + 1,
+                    exc_info=True,
+                )
+
+        for document in remaining:
+            try:
+                await document.insert()
+            except DuplicateKeyError:
+                pass
+            except Exception:
+                self.dropped += 1
+                logger.exception(
+                    "Dropping %s after retries; dead letter: %s", model.__name__, document.model_dump_json()
+                )
+                continue
+            self.flushed += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self._queue.qsize(),
+            "flushed": self.flushed,
+            "sync_fallbacks": self.sync_fallbacks,
+            "retries": self.retries,
+            "dropped": self.dropped,
+        }
+
+
+_writer: Optional[WriteBehindQueue] = None
+
+
+async def init_write_behind() -> None:
+    """
+    Start the shared write-behind flusher if `WRITE_BEHIND_ENABLED` is set.
+
+    Should be invoked on application startup after `init_db`.
+    """
+
+    global _writer
+    settings = get_settings()
+    if _writer is not None or not settings.write_behind_enabled:
+        return
+
+    _writer = WriteBehindQueue(
+        batch_size=settings.write_behind_batch_size,
+        flush_interval=settings.write_behind_flush_interval,
+        max_pending=settings.write_behind_max_pending,
+        enqueue_timeout=settings.write_behind_enqueue_timeout,
+        max_retries=settings.write_behind_max_retries,
+        retry_backoff=settings.write_behind_retry_backoff,
+    )
+    _writer.start()
+
+
+async def close_write_behind() -> None:
+    """Flush pending documents and stop the flusher; call on shutdown."""
+
+    global _writer
+    if _writer is None:
+        return
+
+    writer, _writer = _writer, None
+    await writer.drain()
+
+
+async def write_behind(document: Document) -> None:
+    """Queue `document` for a batched insert, or insert it now when batching is off."""
+
+    if _writer is None:
+        await document.insert()
+        return
+    await _writer.submit(document)
+
+
+def pending_writes(model: Type[D]) -> List[D]:
+    """Documents of `model` this worker has queued but not yet written."""
+
+    return _writer.pending(model) if _writer else []
+
+
+def write_behind_stats() -> Dict[str, int]:
+    return _writer.stats() if _writer else {}
+
+
+register_stats("write_behind", write_behind_stats)
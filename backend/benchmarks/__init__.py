@@ -0,0 +1 @@
+"""Local benchmarks for the ZenSpace backend. Run from `backend/` with `python -m benchmarks.<name>`."""
@@ -0,0 +1,83 @@
+"""
+Compare requests/sec for a fresh `httpx.AsyncClient` per message against the
+shared, pooled client used by `fetch_ai_reply`.
+
+    python -m benchmarks.ai_client --requests 2000 --concurrency 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.config import get_settings
+from app.services.ai_bot import build_ai_client, close_ai_client, fetch_ai_reply, init_ai_client
+
+from .fake_bot import serve_fake_bot
+from .harness import configure_env
+
+
+async def _per_request(url: str, timeout: float) -> None:
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        response = await client.post(url, json={"message": "hello"})
+        response.raise_for_status()
+
+
+async def _run(label: str, call, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return {"mode": label, "requests": total, "seconds": round(elapsed, 3), "rps": round(total / elapsed, 1)}
+
+
+async def main(args: argparse.Namespace) -> list[dict]:
+    configure_env()
+    settings = get_settings()
+    async with serve_fake_bot(port=args.port, latency=args.latency) as url:
+        settings.ai_bot_url = url
+        results = [
+            await _run("per-request", lambda: _per_request(url, settings.ai_bot_timeout), args.requests, args.concurrency)
+        ]
+
+        await init_ai_client()
+        try:
+            results.append(
+                await _run("pooled", lambda: fetch_ai_reply("hello"), args.requests, args.concurrency)
+            )
+        finally:
+            await close_ai_client()
+
+        if args.http2:
+            settings.ai_bot_http2 = True
+            client = build_ai_client(settings)
+            async with client:
+                results.append(
+                    await _run(
+                        "pooled-http2",
+                        lambda: client.post(url, json={"message": "hello"}),
+                        args.requests,
+                        args.concurrency,
+                    )
+                )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake bot latency in seconds")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--http2", action="store_true", help="also measure the pooled client with HTTP/2 enabled")
+    for row in asyncio.run(main(parser.parse_args())):
+        print(json.dumps(row))
@@ -0,0 +1,155 @@
+"""
+Measure guardian alert pipeline throughput against an in-memory Mongo stand-in
+and a notifier with configurable latency and failure rate. Prints one JSON report.
+
+    python -m benchmarks.alerts --users 500 --alerts 20000 --workers 4 --batch-size 200
+    python -m benchmarks.alerts --window 3600 --failure-rate 0.1
+
+With `--window 0` every alert becomes due again immediately, so the run
+measures raw delivery throughput; with a window, repeat alerts for the same
+user are held back and the report shows how many were folded into digests.
+
+Requires `pip install -r benchmarks/requirements.txt`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from .harness import configure_env, use_mongomock
+
+
+async def main(args: argparse.Namespace) -> Dict[str, object]:
+    configure_env()
+    use_mongomock()
+
+    from bson import ObjectId
+
+    from app.db import init_db
+    from app.models.guardian_alert import GuardianAlert
+    from app.models.user import User
+    from app.services.guardian_alerts import (
+        AlertNotifier,
+        AlertPipeline,
+        GuardianNotification,
+        set_alert_notifier,
+    )
+
+    class BenchNotifier(AlertNotifier):
+        def __init__(self) -> None:
+            self.delivered = 0
+            self.batches = 0
+
+        async def send_batch(self, notifications: Sequence[GuardianNotification]) -> List[Optional[Exception]]:
+            await asyncio.sleep(args.notifier_latency)
+            self.batches += 1
+            results: List[Optional[Exception]] = []
+            for _ in notifications:
+                if random.random() < args.failure_rate:
+                    results.append(RuntimeError("simulated delivery failure"))
+                else:
+                    self.delivered += 1
+                    results.append(None)
+            return results
+
+    await init_db()
+    random.seed(7)
+    now = datetime.utcnow()
+    user_ids = [ObjectId() for _ in range(args.users)]
+    await User.get_motor_collection().insert_many(
+        [
+            {
+                "_id": uid,
+                "name": f"bench-{n}",
+                "email": f"bench-{n}@example.com",
+                "parent": {"email": f"guardian-{n}@example.com"},
+            }
+            for n, uid in enumerate(user_ids)
+        ]
+    )
+    await GuardianAlert.get_motor_collection().insert_many(
+        [
+            {
+                "user_id": random.choice(user_ids),
+                "risk_score": 0.9,
+                "flags": ["hopeless"],
+                "categories": {"distress": 0.5},
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "lease": None,
+                "lease_until": None,
+                "created_at": now,
+                "expires_at": now + timedelta(days=1),
+            }
+            for _ in range(args.alerts)
+        ]
+    )
+
+    notifier = BenchNotifier()
+    set_alert_notifier(notifier)
+    pipeline = AlertPipeline(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        poll_interval=0.005,
+        window=args.window,
+        max_attempts=args.max_attempts,
+        backoff=0.01,
+    )
+
+    collection = GuardianAlert.get_motor_collection()
+    started = time.perf_counter()
+    pipeline.start()
+    try:
+        while True:
+            await asyncio.sleep(0.05)
+            due = await collection.count_documents(
+                {
+                    "$or": [
+                        {"status": "pending", "next_attempt_at": {"$lte": datetime.utcnow()}},
+                        {"status": "processing"},
+                    ]
+                }
+            )
+            if not due:
+                break
+    finally:
+        await pipeline.close()
+    elapsed = time.perf_counter() - started
+
+    by_status = {
+        doc["_id"]: doc["count"]
+        async for doc in collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+    }
+    return {
+        "users": args.users,
+        "alerts": args.alerts,
+        "workers": args.workers,
+        "batch_size": args.batch_size,
+        "window_s": args.window,
+        "seconds": round(elapsed, 3),
+        "alerts_per_s": round(pipeline.counts["claimed"] / elapsed, 1),
+        "notifications": notifier.delivered,
+        "notifier_batches": notifier.batches,
+        "status": by_status,
+        "pipeline": pipeline.stats(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--alerts", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--window", type=float, default=0.0, help="Per-user rate-limit window in seconds")
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--notifier-latency", type=float, default=0.02, help="Seconds per notifier batch")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2))
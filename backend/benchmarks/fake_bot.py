@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import uvicorn
+
+
+def create_fake_bot(latency: float = 0.0, error_rate: float = 0.0):
+    """
+    Build a minimal ASGI stand-in for the Flask AI bot.
+
+    Args:
+        latency: Seconds to sleep before replying, simulating generation time.
+            Streaming requests (`"stream": true`) spread it across SSE tokens.
+        error_rate: Fraction of requests (0..1) answered with a 500.
+    """
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        more = True
+        while more:
+            event = await receive()
+            body += event.get("body", b"")
+            more = event.get("more_body", False)
+
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            request = {}
+        reply = f"echo: {request.get('message', '')}"
+
+        if error_rate and random.random() < error_rate:
+            if latency:
+                await asyncio.sleep(latency)
+            status, payload = 500, {"error": "fake bot failure"}
+        elif request.get("stream"):
+            await _stream(send, reply)
+            return
+        else:
+            if latency:
+                await asyncio.sleep(latency)
+            status, payload = 200, {"reply": reply}
+
+        data = json.dumps(payload).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": data})
+
+    async def _stream(send, reply: str) -> None:
+        tokens = [word + " " for word in reply.split(" ")]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream")],
+            }
+        )
+        for token in tokens:
+            if latency:
+                await asyncio.sleep(latency / len(tokens))
+            chunk = f"data: {json.dumps({'token': token})}\n\n".encode()
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"data: [DONE]\n\n"})
+
+    return app
+
+
+@asynccontextmanager
+async def serve_fake_bot(
+    host: str = "127.0.0.1",
+    port: int = 5055,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+) -> AsyncIterator[str]:
+    """Run the fake bot in the current event loop and yield its chat URL."""
+
+    config = uvicorn.Config(
+        create_fake_bot(latency=latency, error_rate=error_rate),
+        host=host,
+        port=port,
+        log_level="warning",
+        lifespan="off",
+    )
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}/api/chat"
+    finally:
+        server.should_exit = True
+        await task
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+import uvicorn
+
+BENCH_ENV = {
+    "MONGO_URI": "mongodb://bench.invalid:27017",
+    "MONGO_DB": "zenspace_bench",
+    "JWT_SECRET": "bench-secret",
+    "GOOGLE_CLIENT_ID": "bench",
+    "GOOGLE_CLIENT_SECRET": "bench",
+    "GOOGLE_REDIRECT_URI": "http://127.0.0.1/callback",
+    # Load tests drive many signups and sends from one IP; production limits would reject most of them.
+    "RATE_LIMIT_ENABLED": "false",
+}
+
+
+def configure_env(**overrides: str) -> None:
+    """
+    Point the app's settings at benchmark stand-ins.
+
+    Must run before anything under `app` is imported, because `get_settings`
+    is cached and several modules read it at import time.
+    """
+
+    for key, value in {**BENCH_ENV, **overrides}.items():
+        os.environ.setdefault(key, value)
+
+
+def use_mongomock() -> None:
+    """Make `init_db` connect to an in-memory mongomock-motor client instead of a real server."""
+
+    from mongomock_motor import AsyncMongoMockClient
+
+    import app.db
+
+    app.db.AsyncIOMotorClient = lambda *args, **kwargs: AsyncMongoMockClient()
+
+
+@asynccontextmanager
+async def serve_app(host: str = "127.0.0.1", port: int = 8055) -> AsyncIterator[str]:
+    """Run `app.main:app` (with its startup/shutdown hooks) in this event loop and yield its base URL."""
+
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "step": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
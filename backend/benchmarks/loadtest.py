@@ -0,0 +1,149 @@
+"""
+End-to-end load test of the FastAPI app against an in-memory Mongo stand-in
+and the fake AI bot. Prints one JSON report; use --out to also save it.
+
+    python -m benchmarks.loadtest flow --users 50 --messages 5
+    python -m benchmarks.loadtest burst --users 20 --requests 2000 --concurrency 100 --bot-latency 0.2
+
+Requires `pip install -r benchmarks/requirements.txt`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from .fake_bot import serve_fake_bot
+from .harness import configure_env, serve_app, summarize, use_mongomock
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.spans: Dict[str, List[float]] = {}
+
+    async def request(
+        self, client: httpx.AsyncClient, step: str, method: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        finished = time.perf_counter()
+        span = self.spans.setdefault(step, [started, finished])
+        span[0], span[1] = min(span[0], started), max(span[1], finished)
+        if response is None or response.status_code >= 400:
+            self.errors[step] += 1
+            return None
+        self.latencies[step].append(finished - started)
+        return response
+
+    def report(self) -> List[Dict[str, float]]:
+        return [
+            summarize(step, self.latencies[step], self.errors[step], end - start)
+            for step, (start, end) in self.spans.items()
+        ]
+
+
+async def _signup(recorder: Recorder, client: httpx.AsyncClient) -> Dict[str, str] | None:
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    body = {"name": "Bench User", "email": email, "password": "correct horse battery"}
+    response = await recorder.request(client, "signup", "POST", "/api/auth/signup", json=body)
+    if response is None:
+        return None
+    return {"email": email, "password": body["password"], **response.json()["tokens"]}
+
+
+async def _flow_user(recorder: Recorder, client: httpx.AsyncClient, messages: int) -> None:
+    account = await _signup(recorder, client)
+    if account is None:
+        return
+    response = await recorder.request(
+        client, "login", "POST", "/api/auth/login", json={"email": account["email"], "password": account["password"]}
+    )
+    if response is None:
+        return
+    tokens = response.json()["tokens"]
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    for i in range(messages):
+        await recorder.request(client, "chat.send", "POST", "/api/chat/send", headers=headers, json={"message": f"hello {i}"})
+    await recorder.request(client, "chat.history", "GET", "/api/chat/history", headers=headers)
+    await recorder.request(client, "refresh", "POST", "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+
+async def run_flow(client: httpx.AsyncClient, args: argparse.Namespace) -> Recorder:
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await _flow_user(recorder, client, args.messages)
+
+    await asyncio.gather(*(one() for _ in range(args.users)))
+    return recorder
+
+
+async def run_burst(client: httpx.AsyncClient, args: argparse.Namespace) -> Recorder:
+    setup = Recorder()
+    accounts = [a for a in await asyncio.gather(*(_signup(setup, client) for _ in range(args.users))) if a]
+    if not accounts:
+        raise SystemExit("burst: could not create any users")
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int) -> None:
+        headers = {"Authorization": f"Bearer {accounts[i % len(accounts)]['access_token']}"}
+        async with semaphore:
+            await recorder.request(client, "chat.send", "POST", "/api/chat/send", headers=headers, json={"message": f"burst {i}"})
+
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    return recorder
+
+
+async def main(args: argparse.Namespace) -> Dict[str, object]:
+    async with serve_fake_bot(port=args.bot_port, latency=args.bot_latency, error_rate=args.bot_error_rate) as bot_url:
+        configure_env(AI_BOT_URL=bot_url)
+        use_mongomock()
+        async with serve_app(port=args.port) as base_url:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                started = time.perf_counter()
+                recorder = await (run_flow if args.scenario == "flow" else run_burst)(client, args)
+                elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": args.scenario,
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "elapsed_s": round(elapsed, 3),
+        "steps": recorder.report(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", choices=["flow", "burst"])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=5, help="chat messages per user in the flow scenario")
+    parser.add_argument("--requests", type=int, default=1000, help="total /api/chat/send calls in the burst scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--bot-latency", type=float, default=0.05)
+    parser.add_argument("--bot-error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8055)
+    parser.add_argument("--bot-port", type=int, default=5055)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    text = json.dumps(asyncio.run(main(args)), indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
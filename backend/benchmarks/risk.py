@@ -0,0 +1,65 @@
+"""
+Micro-benchmark the lexicon risk detector against the old per-keyword substring loop.
+
+    python -m benchmarks.risk --terms 5000 --lengths 100 1000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import string
+import timeit
+
+from app.services.risk import DEFAULT_LEXICON, LexiconRiskDetector, RiskTerm
+
+
+def _synthetic_lexicon(size: int, rng: random.Random) -> list[RiskTerm]:
+    terms = list(DEFAULT_LEXICON)
+    while len(terms) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 3))]
+        terms.append(RiskTerm(" ".join(words), rng.uniform(0.1, 0.9)))
+    return terms
+
+
+def _message(length: int, rng: random.Random) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 8))))
+    words.insert(len(words) // 2, "hopeless")
+    return " ".join(words)[:length]
+
+
+def main(args: argparse.Namespace) -> list[dict]:
+    rng = random.Random(42)
+    lexicon = _synthetic_lexicon(args.terms, rng)
+    keywords = [term.term for term in lexicon]
+
+    build = timeit.timeit(lambda: LexiconRiskDetector(lexicon), number=1)
+    detector = LexiconRiskDetector(lexicon)
+
+    results = []
+    for length in args.lengths:
+        message = _message(length, rng)
+        loop = timeit.timeit(lambda: [kw for kw in keywords if kw.lower() in message.lower()], number=args.repeat)
+        automaton = timeit.timeit(lambda: detector.assess(message), number=args.repeat)
+        results.append(
+            {
+                "terms": len(lexicon),
+                "message_chars": length,
+                "build_ms": round(build * 1000, 2),
+                "keyword_loop_us": round(loop / args.repeat * 1e6, 2),
+                "automaton_us": round(automaton / args.repeat * 1e6, 2),
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, default=5000)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=200)
+    for row in main(parser.parse_args()):
+        print(json.dumps(row))
@@ -0,0 +1,101 @@
+"""
+Per-endpoint serialisation cost: the old dump/re-validate/jsonable_encoder paths
+against the single-pass ones now used by the routes. No database is needed.
+
+    python -m benchmarks.serialization --repeat 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+from beanie import PydanticObjectId
+from fastapi.encoders import jsonable_encoder
+
+from .harness import configure_env
+
+configure_env()  # settings are read at import time by the modules below
+
+from app.models.analytics import Analytics
+from app.models.user import ParentInfo, User
+from app.routes.analytics import AnalyticsOut, _analytics_list
+from app.schemas.auth import ParentInput, UserOut
+
+
+def _user() -> User:
+    now = datetime.utcnow()
+    return User.model_construct(
+        id=PydanticObjectId(),
+        name="Asha Verma",
+        email="asha@example.com",
+        passwordHash="x" * 60,
+        parent=ParentInfo(name="R. Verma", email="parent@example.com", phone="+910000000000"),
+        authProvider="manual",
+        googleSub=None,
+        createdAt=now,
+        updatedAt=now,
+    )
+
+
+def _legacy_user_out(user: User) -> bytes:
+    data = user.model_dump(by_alias=True)
+    data["_id"] = str(user.id)
+    data["parent"] = ParentInput(**user.parent.model_dump())
+    data["firstName"] = user.name.split(" ")[0]
+    out = UserOut(**data)
+    # FastAPI then dumps and validates against response_model once more before rendering.
+    return json.dumps(jsonable_encoder(UserOut(**out.model_dump(by_alias=True)))).encode()
+
+
+def _analytics(count: int) -> tuple[list[Analytics], list[AnalyticsOut]]:
+    user_id = PydanticObjectId()
+    fields = [
+        dict(
+            id=PydanticObjectId(),
+            user_id=user_id,
+            date=datetime.utcnow(),
+            risk_score=0.1,
+            flags={"keywords": ["hopeless"], "categories": {"distress": 0.5}},
+            metadata={},
+        )
+        for _ in range(count)
+    ]
+    return [Analytics.model_construct(**f) for f in fields], [AnalyticsOut.model_construct(**f) for f in fields]
+
+
+def main(args: argparse.Namespace) -> list[dict]:
+    user = _user()
+    docs, views = _analytics(100)
+    cases = {
+        "users.me": (
+            lambda: _legacy_user_out(user),
+            lambda: UserOut.from_user(user).model_dump_json(by_alias=True),
+        ),
+        "analytics.list": (
+            lambda: json.dumps(jsonable_encoder([doc.model_dump(by_alias=True) for doc in docs])).encode(),
+            lambda: _analytics_list.dump_json(views, by_alias=True),
+        ),
+    }
+    results = []
+    for endpoint, (legacy, current) in cases.items():
+        before = timeit.timeit(legacy, number=args.repeat) / args.repeat
+        after = timeit.timeit(current, number=args.repeat) / args.repeat
+        results.append(
+            {
+                "endpoint": endpoint,
+                "legacy_us": round(before * 1e6, 2),
+                "current_us": round(after * 1e6, 2),
+                "speedup": round(before / after, 1),
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    for row in main(parser.parse_args()):
+        print(json.dumps(row))